@@ -0,0 +1,70 @@
+import time
+import pygame
+from rules import card_suit, card_value
+
+class Assets(object):
+    """
+    Loads each image file once and hands out shared surfaces, or
+    subsurfaces for single sprites in a sprite strip. Card faces are
+    rendered once and shared too. Keeps track of time spent loading and
+    memory used by loaded surfaces.
+    """
+    CARD_DIMS = (19, 28)
+
+    def __init__(self, transparent):
+        self.c_transparent = transparent
+        self.faces = {}
+        self.images = {}
+        self.load_time = 0
+        self.sprites = {}
+
+    def get_card_face(self, card, highlight=False):
+        """Returns the face for a rules card int, rendered on first use"""
+        key = (card, highlight)
+        if key not in self.faces:
+            surf = pygame.Surface(self.CARD_DIMS)
+            # Draw card front
+            surf.blit(self.get_image('card_face_highlight.bmp' if highlight else 'card_face.bmp'), (0, 0))
+            # Draw value (each value sprite is 8px wide)
+            surf.blit(self.get_sprite('values.bmp', card_value(card) - 1, (8, 8)), (3, 3))
+            # Draw suit (each suit is 7px wide)
+            surf.blit(self.get_sprite('suits.bmp', card_suit(card), (7, 8)), (10, 3))
+            surf.set_colorkey(self.c_transparent)
+            self.faces[key] = surf
+        return self.faces[key]
+
+    def get_image(self, filename, transparent=False):
+        """
+        Returns the shared surface for an image file. If transparent,
+        the transparent color is set as its colorkey.
+        """
+        if filename not in self.images:
+            start = time.perf_counter()
+            self.images[filename] = pygame.image.load(filename)
+            self.load_time += time.perf_counter() - start
+        image = self.images[filename]
+        if transparent:
+            image.set_colorkey(self.c_transparent)
+        return image
+
+    def get_sprite(self, filename, index, dims):
+        """
+        Returns sprite number index from a horizontal strip of sprites
+        that are dims in size, as a subsurface sharing the strip's
+        pixels.
+        """
+        key = (filename, index)
+        if key not in self.sprites:
+            sprite = self.get_image(filename).subsurface(pygame.Rect((index * dims[0], 0), dims))
+            sprite.set_colorkey(self.c_transparent)
+            self.sprites[key] = sprite
+        return self.sprites[key]
+
+    def get_surface_bytes(self):
+        # Subsurfaces share their parent's pixels, so only count images
+        # and card faces
+        surfaces = list(self.images.values()) + list(self.faces.values())
+        return sum(s.get_width() * s.get_height() * s.get_bytesize() for s in surfaces)
+
+    def report(self):
+        return f'{len(self.images)} images loaded in {self.load_time * 1000:.1f}ms, {self.get_surface_bytes() / 1024:.1f}KB, {len(self.sprites)} sprites, {len(self.faces)} card faces'
@@ -0,0 +1,95 @@
+"""
+Solves a range of numbered deals across a process pool, e.g.
+
+    python batch_solve.py 1 32001 --output results.csv
+
+Each result is appended to the output file as soon as it arrives, as a
+CSV line: deal,status,moves,nodes,seconds. status is one of:
+
+    solved:     a solution was found (moves is its length)
+    unsolvable: every reachable position was searched without one
+    gave_up:    the search hit --max-nodes first
+
+Deals already in the output file are skipped, so an interrupted run
+picks up where it left off.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from deals import get_deal
+from rules import GameState
+from solver import Solver
+
+def read_finished_deals(path):
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path) as file:
+        for line in file:
+            deal = line.split(',')[0]
+            # Skip the header, and any line cut short by an interruption
+            if deal.isdigit() and line.endswith('\n'):
+                finished.add(int(deal))
+    return finished
+
+def trim_partial_line(path):
+    """
+    Cuts off a last line left unfinished by an interruption, so new
+    results don't get appended onto it
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as file:
+        data = file.read()
+        if data and not data.endswith(b'\n'):
+            file.truncate(data.rfind(b'\n') + 1)
+
+def solve_deal(args):
+    deal_number, max_nodes = args
+    solver = Solver(max_nodes=max_nodes)
+    start = time.perf_counter()
+    solution = solver.solve(GameState.from_deal(get_deal(deal_number)))
+    seconds = time.perf_counter() - start
+    if solution is not None:
+        status = 'solved'
+    elif solver.gave_up:
+        status = 'gave_up'
+    else:
+        status = 'unsolvable'
+    moves = len(solution) if solution is not None else 0
+    return deal_number, status, moves, solver.nodes_expanded, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve a range of numbered deals')
+    parser.add_argument('start', type=int, help='first deal number')
+    parser.add_argument('stop', type=int, help='deal number to stop before')
+    parser.add_argument('--output', default='results.csv')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--max-nodes', type=int, default=100000, help='positions to search per deal before giving up')
+    args = parser.parse_args()
+
+    trim_partial_line(args.output)
+    finished = read_finished_deals(args.output)
+    todo = [(n, args.max_nodes) for n in range(args.start, args.stop) if n not in finished]
+    print(f'{len(todo)} deals to solve ({len(finished)} already done) on {args.processes} processes')
+
+    new_file = not os.path.exists(args.output) or not os.path.getsize(args.output)
+    # Line buffered, so every finished deal is on disk straight away
+    with open(args.output, 'a', buffering=1) as file:
+        if new_file:
+            file.write('deal,status,moves,nodes,seconds\n')
+
+        start = time.perf_counter()
+        done = 0
+        with multiprocessing.Pool(args.processes) as pool:
+            for deal_number, status, moves, nodes, seconds in pool.imap_unordered(solve_deal, todo, chunksize=8):
+                file.write(f'{deal_number},{status},{moves},{nodes},{seconds:.4f}\n')
+                done += 1
+                if not done % 1000:
+                    print(f'{done}/{len(todo)} deals, {done / (time.perf_counter() - start):.1f} deals/s')
+
+    print(f'Done: {done} deals in {time.perf_counter() - start:.1f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmarks for the board, rendering, startup, logging and the solver.
+Runs headless (SDL dummy video driver) on fixed deals with scripted
+input, so runs are comparable between revisions:
+
+    python bench.py --output before.json
+    ... change something ...
+    python bench.py --output after.json --compare before.json
+
+Results are written as JSON: one entry per benchmark, with timings in
+milliseconds.
+"""
+import os
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import pygame
+import logger
+import main
+from assets import Assets
+from deals import get_deal
+from renderer import Renderer
+from rules import GameState
+from solver import Solver
+
+DEALS = (1, 617, 1941, 11982, 24000)
+SCRIPT_SEED = 1
+SCRIPT_LENGTH = 2000
+SOLVER_MAX_NODES = 20000 # Keeps deals the solver can't crack from dominating
+
+def get_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(fn, repeat):
+    """Calls fn repeat times and returns timing stats in ms"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return stats(times)
+
+def stats(times):
+    return {
+        'count': len(times),
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        'mean_ms': statistics.fmean(times),
+        'max_ms': max(times),
+    }
+
+def new_board(assets, deal_number):
+    board = main.create_board(assets)
+    board.initialize_card_cols(deal_number)
+    board.initialize_card_target_positions()
+    board.deal(0)
+    board.hover_last_card_in_cascade(1)
+    return board
+
+def get_script(seed, length):
+    """Scripted input: a fixed sequence of D-pad directions and A / B"""
+    rng = random.Random(seed)
+    return [rng.choice(('up', 'right', 'down', 'left', 'A', 'A', 'B')) for _ in range(length)]
+
+def play_script(board, script, timings):
+    """
+    Plays scripted input on board, timing each hot path call into
+    lists in timings
+    """
+    for action in script:
+        if action == 'A':
+            if board.selected_card:
+                start = time.perf_counter()
+                board.place_selected_card(auto_play=True)
+                timings['place_selected_card'].append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                board.draw_order.get_cards()
+                timings['draw_order'].append((time.perf_counter() - start) * 1000)
+            else:
+                board.select_hovered()
+        elif action == 'B':
+            if board.selected_card:
+                board.deselect()
+        else:
+            start = time.perf_counter()
+            board.handle_move_hover(action)
+            timings['handle_move_hover'].append((time.perf_counter() - start) * 1000)
+
+def bench_startup(results, repeat):
+    """Asset loading and building the board from scratch"""
+    load_times = []
+
+    def startup():
+        assets = Assets(pygame.Color('#ff00ff'))
+        assets.get_image('board.bmp')
+        main.create_board(assets)
+        load_times.append(assets.load_time * 1000)
+
+    results['startup'] = measure(startup, repeat)
+    results['startup_asset_load'] = stats(load_times)
+
+def bench_board(results, assets):
+    """Board hot paths, over scripted input on each deal"""
+    timings = {'place_selected_card': [], 'draw_order': [], 'handle_move_hover': []}
+    for deal_number in DEALS:
+        play_script(new_board(assets, deal_number), get_script(SCRIPT_SEED + deal_number, SCRIPT_LENGTH), timings)
+    for name, times in timings.items():
+        results[f'board_{name}'] = stats(times)
+
+    # Setting up a deal (what reset_tableaux used to cover: cascade
+    # runs are now worked out as the state is built)
+    board = new_board(assets, DEALS[0])
+    results['board_initialize_card_cols'] = measure(lambda: board.initialize_card_cols(DEALS[0]), 200)
+
+def bench_render(results, assets, screen):
+    """
+    Cost of a frame as main.py does it: advancing animations, then
+    drawing the cards through the Renderer. Measured while dealing
+    (cards moving), while idle (nothing changed) and with a full
+    redraw.
+    """
+    background = pygame.Surface(screen.get_size())
+    background.blit(assets.get_image('board.bmp'), (0, 0))
+    renderer = Renderer(screen, background)
+    board = main.create_board(assets)
+    board.initialize_card_cols(DEALS[0])
+    board.initialize_card_target_positions()
+    board.deal()
+
+    def draw_frame():
+        board.schedule.update(1 / 60)
+        board.tweens.update(1 / 60)
+        for card in board.cards:
+            card.update()
+        renderer.draw([(card, card.surf, card.pos) for card in board.draw_order.get_cards()])
+
+    dealing = []
+    while board.is_dealing():
+        start = time.perf_counter()
+        draw_frame()
+        dealing.append((time.perf_counter() - start) * 1000)
+    results['render_frame_dealing'] = stats(dealing)
+    results['render_frame_idle'] = measure(draw_frame, 500)
+
+    def full_redraw():
+        renderer.full_redraw = True
+        draw_frame()
+
+    results['render_frame_full'] = measure(full_redraw, 200)
+
+def bench_logger(results):
+    """log() cost per call as the log grows, including flushes"""
+    for size in (1000, 10000, 100000):
+        logger.init_log()
+        start = time.perf_counter()
+        for n in range(size):
+            # Alternate fns so headers are written too
+            logger.log('bench_a' if n % 10 else 'bench_b', f'line {n}')
+            if not n % 10000:
+                logger.flush()
+        logger.flush()
+        results[f'logger_log_{size}'] = {
+            'count': size,
+            'mean_ms': (time.perf_counter() - start) * 1000 / size,
+            'log_bytes': os.path.getsize(logger.LOG_FILE),
+        }
+
+def bench_solver(results):
+    times = []
+    nodes = 0
+    for deal_number in DEALS:
+        solver = Solver(max_nodes=SOLVER_MAX_NODES)
+        start = time.perf_counter()
+        solver.solve(GameState.from_deal(get_deal(deal_number)))
+        times.append((time.perf_counter() - start) * 1000)
+        nodes += solver.nodes_expanded
+    results['solver_solve'] = stats(times)
+    results['solver_solve']['nodes'] = nodes
+    results['solver_solve']['nodes_per_second'] = nodes / sum(times) * 1000
+
+def compare(results, path):
+    """Prints how median (or mean) times changed against an older run"""
+    with open(path) as file:
+        old = json.load(file)['results']
+    for name, result in results.items():
+        key = 'median_ms' if 'median_ms' in result else 'mean_ms'
+        if name in old and old[name].get(key):
+            change = (result[key] - old[name][key]) / old[name][key] * 100
+            print(f'{name:32} {old[name][key]:10.4f} -> {result[key]:10.4f} ms ({change:+.1f}%)')
+
+def main_bench():
+    parser = argparse.ArgumentParser(description='Benchmark the board, rendering, startup, logging and solver')
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--repeat', type=int, default=20, help='repeats for startup timing')
+    args = parser.parse_args()
+
+    # Keep the benchmark's log out of the game's log
+    log_dir = tempfile.mkdtemp()
+    logger.LOG_FILE = os.path.join(log_dir, 'log.txt')
+    logger.init_log()
+
+    pygame.init()
+    screen = pygame.display.set_mode((240, 160))
+    assets = Assets(pygame.Color('#ff00ff'))
+
+    results = {}
+    bench_startup(results, args.repeat)
+    bench_board(results, assets)
+    bench_render(results, assets, screen)
+    bench_solver(results)
+    bench_logger(results)
+
+    report = {
+        'revision': get_revision(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'deals': DEALS,
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f'Results written to {args.output}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+    os.remove(logger.LOG_FILE)
+    os.rmdir(log_dir)
+
+if __name__ == '__main__':
+    main_bench()
@@ -1,359 +1,235 @@
-import random
-import pygame
-from logger import log
+from deals import get_deal
+from journal import Journal
+from layers import DrawOrder
+from logger import DEBUG, is_enabled, log
+from rules import FIRST_CELL, FIRST_FOUNDATION, SUITS, GameState, is_cascade, is_cell, is_foundation
+from solver import get_safe_foundation_moves
+from tween import Scheduler, Tweens
 
 class Board(object):
-    def __init__(self, cards, foundations, cells, bases, transparent):
-        self.all_suits = cards[0].all_suits
+    def __init__(self, cards, foundations, cells, bases, assets):
+        self.all_suits = SUITS
+        self.auto_play_interval = 0.08 # Seconds between auto-played cards
         self.bases = bases
         self.cards = cards
         self.cells = cells
+        self.deal_number = None
+        # Draw order is kept apart from self.cards, which stays in deal
+        # order
+        self.draw_order = DrawOrder()
         self.foundations = foundations
+        # Authoritative game state. Board is a view over it: card
+        # attributes like col, on_cell and pos are derived from it.
+        self.state = GameState()
+        self.card_objects = sorted(cards, key=lambda c: c.id)
+        self.hover_graph = {}
+        self.hover_graph_key = None
         self.hover_marker_positions = []
+        # Optional hint.HintEngine, told about every new position
+        self.hints = None
         self.hovered = None
+        # Moves played, for undo / redo
+        self.journal = Journal()
         self.selected_card = None
+        # Card movement animations, one slot per card id, and when to
+        # start the ones that are waiting (e.g. while dealing)
+        self.schedule = Scheduler()
+        self.tweens = Tweens(len(cards))
         self.valid_moves = []
 
         # Select marker images
-        self.hover_markers = [pygame.image.load('hover_marker_top.bmp'), pygame.image.load('hover_marker_right.bmp'), pygame.image.load('hover_marker_bottom.bmp'), pygame.image.load('hover_marker_left.bmp')]
-        for marker in self.hover_markers:
-            marker.set_colorkey(transparent)
+        self.hover_markers = [assets.get_image(f'hover_marker_{side}.bmp', transparent=True) for side in ('top', 'right', 'bottom', 'left')]
 
-    def deal(self, deal_event):
-        to_deal = [c for c in self.cards if not c.animating and c.pos != c.target_pos]
-        if to_deal:
-            card = to_deal[0]
-            card.animating = True
-            pygame.time.set_timer(deal_event, 50, True)
+    def apply_move(self, move):
+        """
+        Plays a rules move (e.g. one from the solver) through the same
+        select / place flow the player uses.
+        """
+        src, dst, count = move
+        self.selected_card = self.card_objects[self.state.get_cards(src)[-count]]
+        self.hovered = self.get_position(dst)
+        self.place_selected_card()
+
+    def build_hover_graph(self):
+        """
+        Works out where each direction leads from every position the
+        hover can reach from where it is now. Different logic is used
+        depending on whether or not there is already a card selected.
+        """
+        if self.selected_card:
+            find_hover_target = self.find_hover_target_with_selection
+        else:
+            find_hover_target = self.find_hover_target_with_no_selection
+
+        self.hover_graph = {}
+        to_visit = [self.hovered]
+        while to_visit:
+            origin = to_visit.pop()
+            if origin in self.hover_graph:
+                continue
+            neighbours = {}
+            for direction in ('up', 'right', 'down', 'left'):
+                target = find_hover_target(origin, direction)
+                if target:
+                    neighbours[direction] = target
+                    to_visit.append(target)
+            self.hover_graph[origin] = neighbours
+
+        self.hover_graph_key = (self.state.version, self.selected_card)
+        log('build_hover_graph', f'{len(self.hover_graph)} positions')
+
+    def deal(self, interval=0.05):
+        """
+        Sends the cards from the deck to their target positions, one
+        every interval seconds. With an interval of 0, cards are placed
+        straight away with no animation.
+        """
+        self.schedule.clear()
+        for n, card in enumerate(self.cards):
+            if not interval:
+                card.pos = card.target_pos
+            else:
+                self.schedule.add(n * interval, self.tweens.start, card.id, card, card.target_pos)
+
+    def is_dealing(self):
+        return self.schedule.is_pending() or self.tweens.is_animating()
 
     def deselect(self):
         self.hovered = self.selected_card
         self.selected_card = None
+        self.build_hover_graph()
 
     def find_first_card_with_valid_move(self, cards):
         """
         Returns the first card in cards that can move somewhere, or
-        None. This is used to place hover.
+        None. This is used to place hover. A card on a foundation
+        stands for the top card of that foundation.
         """
         for card in cards:
-            # log('find_first_card_with_valid_move', f'Searching for a move for {card.label}')
-            # Card on cell
-            if card.on_cell:
-                # Can move to empty base
-                if len(self.get_empty_bases()):
-                    return card
-                # Can move to foundation
-                foundation_card = self.get_top_card_on_foundation(suit=card.suit)
-                if foundation_card:
-                    if card.suit == foundation_card.suit and card.value == foundation_card.value + 1:
-                        return card
-                # Can move to bottom of cascade
-                for bottom_card in [self.get_last_card_in_cascade(n) for n in range(1, 9)]:
-                    if bottom_card.color != card.color and bottom_card.value == card.value + 1:
-                        return card
-
-            # Card on foundation
-            elif card.on_foundation:
-                # Can move to free cell or empty base
-                if len(self.get_free_cells()) or len(self.get_empty_bases()):
-                    # Return top card from card's foundation
-                    return self.get_top_card_on_foundation(card.suit)
-                # Can move to bottom of cascade
-                for bottom_card in [self.get_last_card_in_cascade(n) for n in range(1, 9)]:
-                    if bottom_card.color != card.color and bottom_card.value == card.value + 1:
-                        return self.get_top_card_on_foundation(card.suit)
-
-            # Card at bottom of cascade
-            elif card == self.get_last_card_in_cascade(index=card.col):
-                # Can move to free cell or empty base
-                if len(self.get_free_cells()) or len(self.get_empty_bases()):
-                    return card
-                # Can move to card on foundation
-                foundation_card = self.get_top_card_on_foundation(suit=card.suit)
-                if foundation_card:
-                    if card.suit == foundation_card.suit and card.value == foundation_card.value + 1:
-                        return card
-                else:
-                    # Ace can move to foundation
-                    if card.value == 1:
-                        return card
-                # Can move to bottom of another cascade
-                for bottom_card in [self.get_last_card_in_cascade(n) for n in range(1, 9)]:
-                    if bottom_card.color != card.color and bottom_card.value == card.value + 1:
-                        return card
-
-            # Card in cascade, but not at the bottom
-            else:
-                # log('find_first_card_with_valid_move', f'{card.label} in cascade but not at bottom')
-                if card.tableau:
-                    if (len(card.tableau) + 1) <= self.get_max_tableau_size():
-                        # Can move to empty base
-                        if len(self.get_empty_bases()):
-                            # log('find_first_card_with_valid_move', f'Move found for {card.label}: Empty base')
-                            return card
-                        # Can move to bottom of another cascade
-                        for bottom_card in [self.get_last_card_in_cascade(n) for n in range(1, 9)]:
-                            if bottom_card: # Handle cascades with no cards
-                                if bottom_card.color != card.color and bottom_card.value == card.value + 1:
-                                    # log('find_first_card_with_valid_move', f'Move found for {card.label}: {bottom_card.label} at bottom of cascade, col {bottom_card.col}')
-                                    return card
-                    # else:
-                    #     log('find_first_card_with_valid_move', f'{card.label}\'s tableau ({len(card.tableau)}) exceeds the maximum size ({self.get_max_tableau_size()})')
-                # else:
-                #     log('find_first_card_with_valid_move', f'{card.label} does not have a tableau, so cannot have a valid move')
+            if card.on_foundation:
+                card = self.get_top_card_on_foundation(card.suit)
+            if self.get_destinations(card):
+                return card
 
         # log('find_first_card_with_valid_move', 'No move found')
         return None
 
     def find_first_valid_position_for_selected_card(self, positions):
+        destinations = self.get_destinations(self.selected_card)
         for position in positions:
-            # Empty foundation (Ace selected)
-            if position in self.foundations:
-                if self.selected_card.value == 1:
-                    return position
-
-            # Empty cell
-            if position in self.cells:
-                """
-                Even though we check tableau size before moving hover
-                to a card in find_first_card_with_valid_move(), we
-                need to check again here for the case where a card
-                with a tableau does have a valid move, but there is
-                also a free cell; so a move to the cell must be
-                disallowed in this case.
-                """
-                if not self.selected_card.tableau:
-                    return position
-                else:
-                    # Conditionals below this hinge on non-cell
-                    # properties like on_foundation, so we need to
-                    # move on to the next position at this point.
-                    continue
-
-            # Empty base
-            if position in self.bases:
-                if (len(self.selected_card.tableau) + 1) <= self.get_max_tableau_size():
-                    return position
-
-            # Same-suit card on foundation (suit check already done)
-            if position.on_foundation and position.value == self.selected_card.value - 1:
-                return position
-
-            # Valid move to cascade
-            if position.color != self.selected_card.color and position.value == self.selected_card.value + 1:
+            if self.get_location(position) in destinations:
                 return position
 
         return None
 
-    def get_available_cells(self):
-        return [c for c in self.cells if c.vacant]
-
-    def get_cards_below_card(self, card):
-        """Returns the cards below a given card, sorted by target Y
-        position, low to high. Using target_pos instead of pos here
-        allows this to run before deal is complete.
-        """
-        return sorted([c for c in self.cards if c.col == card.col and c.target_pos[1] > card.target_pos[1]], key=lambda c:c.pos[1])
-
-    def get_cards_on_cells(self):
-        return [c for c in self.cards if c.on_cell]
-
-    def get_cascade_offset_from_card(self, card):
-        num_cards_in_col = len([c for c in self.cards if c.col == card.col])
-        offset = 14 # TODO: Shrink offset if num_cards_in_col too high
-        y_pos = card.pos[1] + offset
-        return (card.pos[0], y_pos)
-
-    def get_empty_bases(self):
-        return [b for b in self.bases if b.vacant]
-
-    def get_free_cells(self):
-        return [c for c in self.cells if c.vacant]
-
-    def get_last_card_in_cascade(self, index):
-        cascade = [c for c in self.cards if c.col == index]
-        return sorted(cascade, key=lambda c:c.pos[1])[-1] if cascade else None
-
-    def get_max_tableau_size(self):
-        return (5 - len([c for c in self.cards if c.on_cell])) * (len(self.get_empty_bases()) + 1)
-
-    def get_top_card_on_foundation(self, suit):
-        cards = [c for c in self.cards if c.on_foundation and c.suit == suit]
-        return sorted(cards, key=lambda c: c.value)[-1] if cards else None
-
-    def handle_move_hover(self, direction):
-        """
-        Different logic is used to determine where to move the hover
-        selector, depending on whether or not there is already a card
-        selected. This function makes that switch.
+    def find_hover_target_with_no_selection(self, origin, direction):
         """
-        if self.selected_card:
-            self.move_hover_with_selection(direction)
-        else:
-            self.move_hover_with_no_selection(direction)
-
-    def hover_last_card_in_cascade(self, index):
-        cards_in_cascade = [c for c in self.cards if c.col == index]
-        self.hovered = sorted(cards_in_cascade, key=lambda c: c.pos[1])[-1]
-
-    def hover_top_foundation_card(self, suit):
-        self.hovered = sorted([c for c in self.cards if c.suit == suit and c.on_foundation], key=lambda c: c.value)[-1]
+        Returns the nearest card with a valid move in a given direction
+        from origin, or None if there isn't one.
 
-    def initialize_card_cols(self):
-        """
-        col 0:    cells
-        cols 1-8: cascades
-        col 9:    foundations
-        """
-        col = 1
-        for card in self.cards:
-            if col > 8:
-                col = 1
-            card.col = col
-            col += 1
-
-    def initialize_card_target_positions(self):
-        # Anchor point for card at top of col 0 is (32, 6)
-        # Cascades are 23px apart
-        # Cards in cascades are stacked 14px apart
-        for n in range(1, 9):
-            for i, card in enumerate([c for c in self.cards if c.col == n]):
-                x_pos = 32 + (n - 1) * 22
-                y_pos = 6 + i * 14
-                card.target_pos = (x_pos, y_pos)
-
-    def is_tableau(self, cards):
-        if len(cards) < 2:
-            return True
-
-        color = cards[0].color
-        value = cards[0].value
-
-        for card in cards[1:]:
-            if card.color == color or card.value != value - 1:
-                return False
-            color = card.color
-            value = card.value
-
-        return True
-
-    def move_hover_with_no_selection(self, direction):
-        """
-        Determines whether the hover selector can be moved to a valid
-        card in a given direction. If so, the selector is moved to the
-        nearest valid card in that direction; if not, no move is made.
-
-        This fn is called when there is no card selected already.
+        This fn is used when there is no card selected already.
         """
         positions_to_check = []
 
         if direction == 'up':
-            log('move_hover_with_no_selection', 'Attempting to move hover up')
             # Check cards above in current cascade (or on cells)
             positions_to_check = []
             for card in self.cards:
-                if card.col == self.hovered.col and card.pos[1] < self.hovered.pos[1]:
+                if card.col == origin.col and card.target_pos[1] < origin.target_pos[1]:
                     # If card is in a cascade, do a tableau check; if
                     # it's on a cell, don't
                     if card.on_cell:
                         positions_to_check.append(card)
                     else:
-                        if len(card.tableau) == len(self.get_cards_below_card(card)):
+                        if self.get_run_size(card):
                             positions_to_check.append(card)
             # If hovering on a foundation card, check cards in other
             # foundations above
-            if self.hovered.on_foundation:
+            if origin.on_foundation:
                 for suit in self.all_suits:
                     top_card = self.get_top_card_on_foundation(suit)
                     if top_card:
-                        if top_card.pos[1] < self.hovered.pos[1]:
+                        if top_card.target_pos[1] < origin.target_pos[1]:
                             positions_to_check.append(top_card)
-            positions_to_check = sorted(positions_to_check, key=lambda c: c.pos[1], reverse=True)
+            positions_to_check = sorted(positions_to_check, key=lambda c: c.target_pos[1], reverse=True)
 
         elif direction == 'right':
-            log('move_hover_with_no_selection', 'Attempting to move hover right')
             # Check cards in cascades to the right
-            positions_to_check += [c for c in self.cards if self.hovered.col < c.col < 9 and len(c.tableau) == len(self.get_cards_below_card(c))]
+            positions_to_check += [c for c in self.cards if origin.col < c.col < 9 and self.get_run_size(c)]
             # Check cards on foundations
-            if self.hovered.col < 9:
+            if origin.col < 9:
                 for suit in self.all_suits:
                     foundation_card = self.get_top_card_on_foundation(suit)
                     if foundation_card:
                         positions_to_check.append(foundation_card)
-            positions_to_check = sorted(positions_to_check, key=lambda c: c.pos[0])
+            # Sort by x position, then top to bottom within a column
+            positions_to_check = sorted(positions_to_check, key=lambda c: (c.target_pos[0], c.target_pos[1]))
 
         elif direction == 'down':
-            log('move_hover_with_no_selection', 'Attempting to move hover down')
             # Check cards below in current cascade (or on cells)
             positions_to_check = []
             for card in self.cards:
-                if card.col == self.hovered.col and card.pos[1] > self.hovered.pos[1]:
+                if card.col == origin.col and card.target_pos[1] > origin.target_pos[1]:
                     # If card is in a cascade, do a tableau check; if
                     # it's on a cell, don't
                     if card.on_cell:
                         positions_to_check.append(card)
                     else:
-                        if len(card.tableau) == len(self.get_cards_below_card(card)):
+                        if self.get_run_size(card):
                             positions_to_check.append(card)
             # If hovering on a foundation card, check cards in other
             # foundations below
-            if self.hovered.on_foundation:
+            if origin.on_foundation:
                 for suit in self.all_suits:
                     top_card = self.get_top_card_on_foundation(suit)
                     if top_card:
-                        if top_card.pos[1] > self.hovered.pos[1]:
+                        if top_card.target_pos[1] > origin.target_pos[1]:
                             positions_to_check.append(top_card)
-            positions_to_check = sorted(positions_to_check, key=lambda c: c.pos[1])
+            positions_to_check = sorted(positions_to_check, key=lambda c: c.target_pos[1])
 
         elif direction == 'left':
-            log('move_hover_with_no_selection', 'Attempting to move hover left')
             # Check cards in cascades to the left
-            positions_to_check += [c for c in self.cards if c.col < self.hovered.col and len(c.tableau) == len(self.get_cards_below_card(c))]
+            positions_to_check += [c for c in self.cards if c.col < origin.col and self.get_run_size(c)]
             # Check cards on cells
-            if self.hovered.col > 0:
+            if origin.col > 0:
                 positions_to_check += self.get_cards_on_cells()
-            positions_to_check = sorted(positions_to_check, key=lambda c: c.pos[0], reverse=True)
+            # Sort by x position, right to left, then top to bottom
+            positions_to_check = sorted(positions_to_check, key=lambda c: (-c.target_pos[0], c.target_pos[1]))
 
-        if positions_to_check:
-            log('move_hover_with_no_selection', f'positions to check: {", ".join([c.label for c in positions_to_check])}')
-            hover = self.find_first_card_with_valid_move(positions_to_check)
-            if hover:
-                self.hovered = hover
-                log('move_hover_with_no_selection', f'Hovered is now {self.hovered.label} in col {self.hovered.col}')
+        return self.find_first_card_with_valid_move(positions_to_check)
 
-    def move_hover_with_selection(self, direction):
+    def find_hover_target_with_selection(self, origin, direction):
         """
-        Determines whether the hover selector can be moved to a valid
-        place in a given direction. If so, the selector is moved to the
-        nearest valid place in that direction; if not, no move is made.
+        Returns the nearest valid place to move selected_card to in a
+        given direction from origin, or None if there isn't one.
 
-        This fn is called when there is already a card selected.
+        This fn is used when there is already a card selected.
 
         ('Up' and 'Down' are not considered here, as there is no case
         where a player can move a card to a higher or lower position
         within a cascade, or from one foundation to another, and moving between cells is not allowed in this version because it is
         pointless.)
         """
+        positions_to_check = []
+
         if direction == 'right':
-            log('move_hover_with_selection', 'Attempting to move hover right')
             # Check bottom cards in cascades to the right
-            positions_to_check = [self.get_last_card_in_cascade(n) for n in range(max(self.hovered.col, 1), 9)]
+            positions_to_check = [self.get_last_card_in_cascade(n) for n in range(max(origin.col, 1), 9)]
             # Remove currently hovered position from potential positions
             # to move hover to
-            if self.hovered in positions_to_check:
-                positions_to_check.pop(positions_to_check.index(self.hovered))
+            if origin in positions_to_check:
+                positions_to_check.pop(positions_to_check.index(origin))
             # Check card on same-suit foundation
-            if self.hovered.col < 9:
+            if origin.col < 9:
                 foundation_card = self.get_top_card_on_foundation(self.selected_card.suit)
                 if foundation_card:
                     positions_to_check.append(foundation_card)
                 else:
                     # Check empty foundation (if moving an Ace)
                     if self.selected_card.value == 1:
-                        log('move_hover_with_selection', 'Special logic: selected card is an Ace')
                         positions_to_check += [f for f in self.foundations if f.suit == self.selected_card.suit]
             # Check empty bases
-            positions_to_check += [b for b in self.bases if b.vacant and b.col > self.hovered.col]
+            positions_to_check += [b for b in self.bases if b.vacant and b.col > origin.col]
 
             # Drop null returns from get_last_card_in_cascade (if
             # column is empty)
@@ -362,185 +238,342 @@ class Board(object):
             positions_to_check = sorted(positions_to_check, key=lambda p: p.col)
 
         elif direction == 'left':
-            log('move_hover_with_selection', 'Attempting to move hover left')
             # Check bottom cards in cascades to the left
-            positions_to_check = [self.get_last_card_in_cascade(n) for n in range(1, self.hovered.col)]
+            positions_to_check = [self.get_last_card_in_cascade(n) for n in range(1, origin.col)]
             # Remove currently hovered position from potential positions
             # to move hover to
-            if self.hovered in positions_to_check:
-                positions_to_check.pop(positions_to_check.index(self.hovered))
+            if origin in positions_to_check:
+                positions_to_check.pop(positions_to_check.index(origin))
             # Check empty cells
             positions_to_check += [c for c in self.cells if c.vacant]
             # Check empty bases
-            positions_to_check += [b for b in self.bases if b.vacant and b.col < self.hovered.col]
+            positions_to_check += [b for b in self.bases if b.vacant and b.col < origin.col]
 
+            # Drop null returns from get_last_card_in_cascade (if
+            # column is empty)
+            positions_to_check = [p for p in positions_to_check if p]
             # Sort positions by column from high to low
             positions_to_check = sorted(positions_to_check, key=lambda p: p.col, reverse=True)
 
-        if positions_to_check:
-            log('move_hover_with_selection', f'positions to check: {", ".join([c.label for c in positions_to_check])}')
-            hover = self.find_first_valid_position_for_selected_card(positions_to_check)
-            if hover:
-                self.hovered = hover
+        return self.find_first_valid_position_for_selected_card(positions_to_check)
+
+    def get_cards_on_cells(self):
+        return [self.card_objects[c] for c in self.state.cells if c is not None]
+
+    def get_cascade_position(self, col, index):
+        # Anchor point for card at top of col 1 is (32, 6)
+        # Cascades are 22px apart
+        # Cards in cascades are stacked 14px apart
+        offset = 14 # TODO: Shrink offset if cascade too long
+        return (32 + (col - 1) * 22, 6 + index * offset)
+
+    def get_destinations(self, card):
+        """
+        Returns the rules locations that card (with any cards that move
+        with it) can legally move to
+        """
+        return self.state.get_destinations(self.get_location(card), self.get_run_size(card))
+
+    def get_last_card_in_cascade(self, index):
+        return self.get_last_card_at(index - 1)
+
+    def get_last_card_at(self, location):
+        card = self.state.get_last_card(location)
+        return self.card_objects[card] if card is not None else None
+
+    def get_location(self, position):
+        """Returns the rules location of a card, cell, foundation or base"""
+        if position in self.cells:
+            return FIRST_CELL + self.cells.index(position)
+        if position in self.foundations:
+            return FIRST_FOUNDATION + self.all_suits.index(position.suit)
+        if position in self.bases:
+            return position.col - 1
+        if position.on_cell:
+            return FIRST_CELL + self.state.cells.index(position.id)
+        if position.on_foundation:
+            return FIRST_FOUNDATION + self.all_suits.index(position.suit)
+        return position.col - 1
+
+    def get_position(self, location):
+        """
+        Returns the hoverable position for a rules location: its last
+        card, or the cell, foundation or base itself if it is empty.
+        """
+        card = self.get_last_card_at(location)
+        if is_cell(location):
+            return self.cells[location - FIRST_CELL]
+        if card:
+            return card
+        if is_foundation(location):
+            return self.foundations[location - FIRST_FOUNDATION]
+        return self.bases[location]
+
+    def get_run_size(self, card):
+        """
+        Number of cards that move when card is selected: card and the
+        cards below it, or 0 if they don't form a valid tableau. Cards
+        on cells or foundations move alone.
+        """
+        if card.on_cell or card.on_foundation:
+            return 1
+        index = card.col - 1
+        size = len(self.state.cascades[index]) - card.row
+        return size if size <= self.state.get_run_length(index) else 0
+
+    def get_top_card_on_foundation(self, suit):
+        return self.get_last_card_at(FIRST_FOUNDATION + self.all_suits.index(suit))
+
+    def handle_move_hover(self, direction):
+        """
+        Moves the hover selector in a direction, if there is somewhere
+        valid to go. Targets come from the hover graph, so this is a
+        lookup unless the board or selection has changed since it was
+        built.
+        """
+        if self.hover_graph_key != (self.state.version, self.selected_card) or self.hovered not in self.hover_graph:
+            self.build_hover_graph()
+
+        hover = self.hover_graph[self.hovered].get(direction)
+        if hover:
+            self.hovered = hover
+            if self.selected_card:
                 self.set_hover_marker_positions()
-                log('move_hover_with_selection', f'Hovered is now {self.hovered.label} in col {self.hovered.col}')
-
-    def place_selected_card(self):
-        """
-        Move selected card to 'hovered' position. This position is
-        assumed to be a valid move.
-        """
-        if self.selected_card.on_cell:
-            # Clear 'card' prop from cell that selected_card moved from
-            cell = [c for c in self.cells if c.card == self.selected_card][0]
-            cell.card = None
-            cell.vacant = True
-
-        self.selected_card.on_cell = False
-        self.selected_card.on_foundation = False
-
-        # On free cell
-        if self.hovered in self.cells:
-            self.selected_card.on_cell = True
-            self.selected_card.move(pos=self.hovered.pos, col=0)
-            self.hovered.card = self.selected_card
-            self.hovered.vacant = False
-            self.hovered = self.selected_card
-
-        # On foundation
-        elif self.hovered in self.foundations:
-            self.selected_card.on_foundation = True
-            self.selected_card.move(pos=self.hovered.pos, col=9)
-            self.hover_top_foundation_card(suit=self.hovered.suit)
-
-        # On empty base (base.vacant property updated in
-        # set_base_vacancy call below)
-        elif self.hovered in self.bases:
-            self.selected_card.move(pos=self.hovered.pos, col=self.hovered.col)
-            self.hovered = self.get_last_card_in_cascade(self.hovered.col)
-
-        # On card in foundation
-        elif self.hovered.on_foundation:
-            self.selected_card.on_foundation = True
-            self.selected_card.move(pos=self.hovered.pos, col=9)
-            self.hover_top_foundation_card(suit=self.hovered.suit)
-
-        # On bottom of cascade
-        else:
-            self.selected_card.move(pos=self.get_cascade_offset_from_card(self.hovered), col=self.hovered.col)
-            self.hovered = self.get_last_card_in_cascade(self.hovered.col)
+            if is_enabled(DEBUG):
+                log('handle_move_hover', f'Hovered is now {self.hovered.label} in col {self.hovered.col}')
+
+    def hover_last_card_in_cascade(self, index):
+        self.hovered = self.get_last_card_in_cascade(index)
+        self.build_hover_graph()
+
+    def hover_top_foundation_card(self, suit):
+        self.hovered = self.get_top_card_on_foundation(suit)
+
+    def initialize_card_cols(self, deal_number=None):
+        """
+        Deals self.cards into the cascades in their current order or, if
+        deal_number is given, in the order of that numbered deal.
+
+        col 0:    cells
+        cols 1-8: cascades
+        col 9:    foundations
+        """
+        if deal_number is not None:
+            self.deal_number = deal_number
+            self.cards = [self.card_objects[c] for c in get_deal(deal_number)]
+        self.state = GameState.from_deal([c.id for c in self.cards])
+        self.journal.clear()
+        if self.hints:
+            self.hints.request(self.state)
+        for n, cascade in enumerate(self.state.cascades):
+            for i, card in enumerate(cascade):
+                self.card_objects[card].col = n + 1
+                self.card_objects[card].row = i
+        self.draw_order.clear()
+        for card in self.cards:
+            self.draw_order.move_to_cascade(card, card.row)
+
+    def initialize_card_target_positions(self):
+        for n, cascade in enumerate(self.state.cascades):
+            for i, card in enumerate(cascade):
+                self.card_objects[card].target_pos = self.get_cascade_position(n + 1, i)
+
+    def move_card(self, card, pos, col, delay=0):
+        """Moves card to col and animates it to pos, after delay seconds"""
+        card.move(pos=pos, col=col)
+        self.tweens.start(card.id, card, pos, delay)
+
+    def move_cards(self, moves, hover_location, interval=0):
+        """
+        Plays rules moves on the board, then brings cards, cells and
+        hover up to date once for the lot: each location touched is
+        synced once, however many moves touched it. Cards going to the
+        foundations set off interval seconds apart, in move order.
+
+        Hovers the last card at hover_location, or if that is now empty
+        (e.g. its cards were auto-played), the last card moved.
+        """
+        delays = {}
+        locations = []
+        for n, move in enumerate(moves):
+            src, dst, count = move
+            if is_foundation(dst):
+                delays[self.state.get_last_card(src)] = n * interval
+            self.state.apply(move)
+            for location in (src, dst):
+                if location not in locations:
+                    locations.append(location)
+        if self.hints:
+            # Drops the hint for the old position
+            self.hints.request(self.state)
+        for location in locations:
+            self.sync_location(location, delays)
+
+        self.hovered = self.get_last_card_at(hover_location) or self.get_last_card_at(moves[-1][1])
 
         self.selected_card = None
-        self.reset_tableaux()
         self.set_base_vacancy()
+        self.build_hover_graph()
 
-    def reset_tableaux(self):
-        """Resets tableaux for all cards"""
-        for card in self.cards:
-            self.set_tableau(card)
-        log('reset_tableaux', 'Complete')
+    def place_selected_card(self, auto_play=False):
+        """
+        Move selected card (and any tableau below it) to 'hovered'
+        position. This position is assumed to be a valid move.
+
+        With auto_play, any cards that are then safe to put on the
+        foundations (see solver.get_safe_foundation_moves) go there too,
+        as part of the same move.
+        """
+        card = self.selected_card
+        move = (self.get_location(card), self.get_location(self.hovered), self.get_run_size(card))
+        self.journal.record(move)
+        moves = [move]
+
+        if auto_play:
+            # Work the safe moves out on the state, then take them back
+            # so move_cards() can play everything in one batch
+            self.state.apply(move)
+            auto_moves = get_safe_foundation_moves(self.state)
+            for auto_move in reversed(auto_moves):
+                self.state.undo(auto_move)
+            self.state.undo(move)
+            for auto_move in auto_moves:
+                self.journal.record(auto_move, chained=True)
+            moves += auto_moves
+            if auto_moves:
+                log('place_selected_card', f'Auto-playing {len(auto_moves)} cards')
+
+        self.move_cards(moves, hover_location=move[1], interval=self.auto_play_interval)
+
+    def redo(self):
+        moves = self.journal.redo()
+        if moves:
+            log('redo', f'Redoing {moves}')
+            self.move_cards(moves, hover_location=moves[0][1])
 
     def select_hovered(self):
         self.selected_card = self.hovered
         log('select_hovered', f'Selected hovered card {self.selected_card.label} in col {self.selected_card.col}')
-        self.set_hover_from_selected()
+        if not self.set_hover_from_selected():
+            log('select_hovered', f'{self.selected_card.label} has no valid moves')
+            self.selected_card = None
+            return
         self.set_hover_marker_positions()
+        self.build_hover_graph()
         log('select_hovered', f'Hovered is now {self.hovered.label} in col {self.hovered.col}')
 
     def set_base_vacancy(self):
         for base in self.bases:
-            base.vacant = not bool(len([c for c in self.cards if c.col == base.col]))
-
-    def set_cards_z_index(self):
-        """
-        Card draw order:
-        1. Cards in cascades (by Y value, low to high)
-        2. Cards on foundations (by value, low to high)
-        3. Cards on cells (unsorted)
-        """
-        cascade_cards = sorted([c for c in self.cards if not c.on_cell and not c.on_foundation], key=lambda c: c.pos[1])
-        foundation_cards = sorted([c for c in self.cards if c.on_foundation], key=lambda c: c.value)
-        self.cards = cascade_cards + foundation_cards + [c for c in self.cards if c.on_cell]
+            base.vacant = not self.state.cascades[base.col - 1]
 
     def set_hover_from_selected(self):
         """
         Moves hover to the nearest valid move to selected_card.
         Checks foundations first, then cascades and bases, then empty cells.
         Cascade and base positions are sorted by nearest first.
+        Returns False if selected_card can't move anywhere.
         """
+        destinations = self.get_destinations(self.selected_card)
+
         # Check foundation / top foundation card
-        foundation_card = self.get_top_card_on_foundation(self.selected_card.suit)
-        if foundation_card:
-            if self.selected_card.value == foundation_card.value + 1:
-                self.hovered = foundation_card
-                return
-        else:
-            if self.selected_card.value == 1:
-                self.hovered = [f for f in self.foundations if f.suit == self.selected_card.suit][0]
-                return
-
-        # Check bottom cascade cards
-        positions = []
-        for n in range(1, 9):
-            if n != self.selected_card.col:
-                bottom_card = self.get_last_card_in_cascade(n)
-                if bottom_card: # Handle empty cascade
-                    if bottom_card.color != self.selected_card.color and bottom_card.value == self.selected_card.value + 1:
-                        positions.append(bottom_card)
-        # Check empty bases
-        positions += self.get_empty_bases()
-        # Sort cascade cards and bases by x position, nearest first
+        for location in destinations:
+            if is_foundation(location):
+                self.hovered = self.get_position(location)
+                return True
+
+        # Check bottom cascade cards and empty bases, nearest first
+        positions = [self.get_position(n) for n in destinations if is_cascade(n)]
         if positions:
-            self.hovered = sorted(positions, key=lambda c: abs(self.selected_card.pos[0] - c.pos[0]))[0]
-            return
+            self.hovered = sorted(positions, key=lambda c: abs(self.selected_card.target_pos[0] - c.target_pos[0]))[0]
+            return True
 
         # Hover over first free cell
-        self.hovered = self.get_free_cells()[0]
+        cells = [n for n in destinations if is_cell(n)]
+        if cells:
+            self.hovered = self.get_position(cells[0])
+            return True
+
+        return False
 
     def set_hover_marker_positions(self):
         # Top (11 x 8 px)
-        x_pos = self.hovered.pos[0] + int(self.hovered.dims[0] / 2) - 5
-        y_pos = self.hovered.pos[1] - 4
+        x_pos = self.hovered.target_pos[0] + int(self.hovered.dims[0] / 2) - 5
+        y_pos = self.hovered.target_pos[1] - 4
         positions = [(x_pos, y_pos)]
 
         # Right (8 x 11 px)
-        x_pos = self.hovered.pos[0] + self.hovered.dims[0] - 4
-        y_pos = self.hovered.pos[1] + int(self.hovered.dims[1] / 2) - 6
+        x_pos = self.hovered.target_pos[0] + self.hovered.dims[0] - 4
+        y_pos = self.hovered.target_pos[1] + int(self.hovered.dims[1] / 2) - 6
         positions.append((x_pos, y_pos))
 
         # Bottom (11 x 8 px)
-        x_pos = self.hovered.pos[0] + int(self.hovered.dims[0] / 2) - 5
-        y_pos = self.hovered.pos[1] + self.hovered.dims[1] - 4
+        x_pos = self.hovered.target_pos[0] + int(self.hovered.dims[0] / 2) - 5
+        y_pos = self.hovered.target_pos[1] + self.hovered.dims[1] - 4
         positions.append((x_pos, y_pos))
 
         # Left (8 x 11 px)
-        x_pos = self.hovered.pos[0] + - 4
-        y_pos = self.hovered.pos[1] + int(self.hovered.dims[1] / 2) - 6
+        x_pos = self.hovered.target_pos[0] + - 4
+        y_pos = self.hovered.target_pos[1] + int(self.hovered.dims[1] / 2) - 6
         positions.append((x_pos, y_pos))
 
         self.hover_marker_positions = positions
 
-    def set_tableau(self, card):
-        # Cards on cells or foundations have no tableaux
-        # log('set_tableau', f'Setting tableau for {card.label}')
-        card.tableau = []
-        cards_below = self.get_cards_below_card(card)
-        # log('set_tableau', f'Cards below {card.label}: {", ".join([c.label for c in cards_below])}')
-        for n in range(len(cards_below)):
-            cards = [card] + cards_below[:n + 1]
-            if self.is_tableau(cards):
-                card.tableau.append(cards_below[n])
-            else:
-                break
-
-        # Sort tableau by descending value; this allows card.move() to
-        # set Y positions for tableaux accurately
-        if card.tableau:
-            card.tableau = sorted(card.tableau, key=lambda c: c.value, reverse=True)
-            log('set_tableau', f'{card.label}\'s tableau: {", ".join([c.label for c in card.tableau])}')
+    def show_hint(self, move):
+        """
+        Selects the card(s) a rules move would move and hovers where they
+        would go, so the hint can be played with one press
+        """
+        src, dst, count = move
+        self.selected_card = self.card_objects[self.state.get_cards(src)[-count]]
+        self.hovered = self.get_position(dst)
+        self.set_hover_marker_positions()
+        self.build_hover_graph()
+        log('show_hint', f'Hint: {self.selected_card.label} to {self.hovered.label}')
 
-    def shuffle(self):
-        random.shuffle(self.cards)
+    def sync_location(self, location, delays=None):
+        """
+        Updates the cards at a rules location (and the cell, if it is
+        one) to match the game state. delays maps card ids to how long
+        their animations wait to start.
+        """
+        cards = [self.card_objects[c] for c in self.state.get_cards(location)]
+        delays = delays or {}
+
+        if is_cascade(location):
+            col = location + 1
+            for i, card in enumerate(cards):
+                card.on_cell = False
+                card.on_foundation = False
+                card.row = i
+                pos = self.get_cascade_position(col, i)
+                if card.target_pos != pos or card.col != col:
+                    self.move_card(card, pos, col)
+                    self.draw_order.move_to_cascade(card, i)
+
+        elif is_cell(location):
+            cell = self.cells[location - FIRST_CELL]
+            cell.vacant = not cards
+            for card in cards:
+                card.on_cell = True
+                card.on_foundation = False
+                self.move_card(card, cell.pos, 0)
+                self.draw_order.move_to_cell(card)
+
+        # Only cards that have just arrived on a foundation can have
+        # changed
+        else:
+            for card in cards:
+                if not card.on_foundation:
+                    card.on_cell = False
+                    card.on_foundation = True
+                    self.move_card(card, self.foundations[location - FIRST_FOUNDATION].pos, 9, delays.get(card.id, 0))
+                    self.draw_order.move_to_foundation(card)
+
+    def undo(self):
+        moves = self.journal.undo()
+        if moves:
+            log('undo', f'Undoing with {moves}')
+            self.move_cards(moves, hover_location=moves[-1][1])
 
     def update_highlights(self):
         for card in self.cards:
@@ -18,7 +18,6 @@ class Cell(object):
         elif cell_type == 'cell':
             # Anchor point for cell 0 is (7, 6)
             # Cells are 40px apart
-            self.card = None
             self.label = f'cell #{pos}'
             self.pos = (7, 6 + pos * 40)
 
@@ -27,3 +26,7 @@ class Cell(object):
             # Foundations are 40px apart
             self.label = f'{suit} foundation'
             self.pos = (215, 6 + pos * 40)
+
+        # Cells never move, but share target_pos with cards so hover
+        # code can treat both alike
+        self.target_pos = self.pos
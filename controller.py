@@ -36,13 +36,29 @@ class Controller(object):
             'pressed': False
         }
 
+        self.btn_l = {
+            'name': 'L',
+            'map': pygame.K_q, # Keyboard 'Q'
+            'pressed': False
+        }
+        self.btn_r = {
+            'name': 'R',
+            'map': pygame.K_e, # Keyboard 'E'
+            'pressed': False
+        }
+
+        self.btn_select = {
+            'name': 'SELECT',
+            'map': pygame.K_h, # Keyboard 'H'
+            'pressed': False
+        }
         self.btn_start = {
             'name': 'START',
             'map': pygame.K_SPACE, # Keyboard 'SPACE'
             'pressed': False
         }
 
-        self.buttons = (self.btn_a, self.btn_b, self.btn_dpad_u, self.btn_dpad_r, self.btn_dpad_d, self.btn_dpad_l)
+        self.buttons = (self.btn_a, self.btn_b, self.btn_dpad_u, self.btn_dpad_r, self.btn_dpad_d, self.btn_dpad_l, self.btn_l, self.btn_r, self.btn_select, self.btn_start)
         self.dpad = (self.btn_dpad_u, self.btn_dpad_r, self.btn_dpad_d, self.btn_dpad_l)
 
     def get_action_button(self, event):
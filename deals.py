@@ -0,0 +1,31 @@
+"""
+Numbered deals, compatible with Microsoft FreeCell game numbers. No
+pygame needed, so layouts can be generated in bulk.
+"""
+from rules import make_card
+
+# Microsoft's unshuffled deck, as rules card ints: A-K, with suits in
+# the order clubs, diamonds, hearts, spades within each value
+MS_SUIT_ORDER = (1, 2, 3, 0)
+MS_DECK = [make_card(i // 4 + 1, MS_SUIT_ORDER[i % 4]) for i in range(52)]
+
+def get_deal(number):
+    """
+    Returns the cards (rules ints, in deal order) for a deal number,
+    using Microsoft's LCG shuffle. Deal them round-robin across the
+    cascades, e.g. with GameState.from_deal().
+    """
+    seed = number
+    deck = list(MS_DECK)
+    cards = []
+    for remaining in range(52, 0, -1):
+        seed = (seed * 214013 + 2531011) & 0xffffffff
+        j = ((seed >> 16) & 0x7fff) % remaining
+        cards.append(deck[j])
+        deck[j] = deck[remaining - 1]
+    return cards
+
+def iter_deals(start, stop):
+    """Yields (number, cards) for each deal number in range(start, stop)"""
+    for number in range(start, stop):
+        yield number, get_deal(number)
@@ -0,0 +1,91 @@
+"""
+Hints and solutions, worked out in the background. A worker process
+searches from the latest position it was sent. For a hint it sends
+back the best looking move straight away, then the first move of a
+solution if the search finds one; for a solve it sends back the whole
+solution (or None). Sending a new position stops any search still
+running for an old one.
+
+The game loop only ever sends positions and polls for answers, neither
+of which waits on the worker.
+"""
+import multiprocessing
+import tracing
+from rules import GameState
+from solver import Solver
+
+def hint_worker(conn, max_nodes):
+    # Spans recorded in this process would never be saved
+    tracing.disable()
+    while True:
+        request = conn.recv()
+        # Only the latest position matters
+        while request is not None and conn.poll():
+            request = conn.recv()
+        if request is None:
+            return
+
+        request_id, kind, data = request
+        state = GameState.unpack(data)
+        solver = Solver(max_nodes=max_nodes, should_stop=conn.poll)
+        if kind == 'hint':
+            # Something to show while the search runs
+            conn.send((request_id, solver.get_best_move(state)))
+        solution = solver.solve(state)
+        if solver.stopped:
+            continue
+        if kind == 'solve':
+            conn.send((request_id, (solution, solver.nodes_expanded)))
+        elif solution:
+            conn.send((request_id, solution[0]))
+
+class HintEngine(object):
+    def __init__(self, max_nodes=100000):
+        self.answer = None
+        self.conn, worker_conn = multiprocessing.Pipe()
+        self.kind = None
+        self.process = multiprocessing.Process(target=hint_worker, args=(worker_conn, max_nodes), name='hints', daemon=True)
+        self.process.start()
+        self.request_id = 0
+
+    def close(self):
+        self.conn.send(None)
+        self.process.join(1)
+
+    def get_answer(self, kind):
+        """
+        Returns the answer to the latest request if it was of kind and
+        has arrived, otherwise None
+        """
+        while self.conn.poll():
+            request_id, answer = self.conn.recv()
+            if request_id == self.request_id:
+                self.answer = answer
+        return self.answer if self.kind == kind else None
+
+    def get_hint(self):
+        """
+        Returns the hint for the latest position sent, or None if it
+        isn't ready yet (or there are no moves). The quick first guess is
+        replaced by the solution's first move once that arrives.
+        """
+        return self.get_answer('hint')
+
+    def get_solution(self):
+        """
+        Returns (solution, positions searched) once the solve asked for
+        by solve() is done, otherwise None. solution is None if none was
+        found.
+        """
+        return self.get_answer('solve')
+
+    def request(self, state, kind='hint'):
+        """Starts looking for a hint for state, dropping any old one"""
+        self.answer = None
+        self.kind = kind
+        self.request_id += 1
+        self.conn.send((self.request_id, kind, state.pack()))
+
+    def solve(self, state):
+        """Starts looking for a full solution from state"""
+        self.request(state, kind='solve')
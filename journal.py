@@ -0,0 +1,90 @@
+"""
+Undo / redo history. Each move is packed into 2 bytes (src and dst take
+4 bits each, count the next 7) and kept in an array, so long games
+cost next to nothing to remember. The top bit marks a move that was
+made automatically after the one before it (auto-play), so the two are
+undone and redone together.
+"""
+from array import array
+
+MAX_MOVES = 1 << 16 # 128KB of history
+CHAINED = 1 << 15
+
+def pack_move(move, chained=False):
+    src, dst, count = move
+    return src | dst << 4 | count << 8 | (CHAINED if chained else 0)
+
+def unpack_move(packed):
+    return (packed & 0xf, packed >> 4 & 0xf, packed >> 8 & 0x7f)
+
+class Journal(object):
+    """
+    Moves played so far, and moves undone that can still be redone.
+    Moves before cursor have been played; moves from cursor on have
+    been undone. Playing a new move forgets anything undone.
+
+    Once max_moves is reached, the oldest half of the history is
+    dropped, so memory stays bounded however long a game goes on.
+    """
+    def __init__(self, max_moves=MAX_MOVES):
+        self.cursor = 0
+        self.max_moves = max_moves
+        self.moves = array('H')
+
+    def can_redo(self):
+        return self.cursor < len(self.moves)
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def clear(self):
+        self.cursor = 0
+        del self.moves[:]
+
+    def get_moves(self):
+        """Returns the moves played (not counting any undone)"""
+        return [unpack_move(m) for m in self.moves[:self.cursor]]
+
+    def record(self, move, chained=False):
+        """
+        Adds a move played. A chained move is undone and redone along
+        with the move before it.
+        """
+        del self.moves[self.cursor:]
+        if len(self.moves) >= self.max_moves:
+            del self.moves[:self.max_moves // 2]
+            # Don't leave half a group at the start
+            while self.moves and self.moves[0] & CHAINED:
+                del self.moves[0]
+        self.moves.append(pack_move(move, chained))
+        self.cursor = len(self.moves)
+
+    def redo(self):
+        """
+        Returns the next undone move, with any moves chained to it, to
+        play again (or an empty list)
+        """
+        moves = []
+        while self.can_redo():
+            if moves and not self.moves[self.cursor] & CHAINED:
+                break
+            moves.append(unpack_move(self.moves[self.cursor]))
+            self.cursor += 1
+        return moves
+
+    def undo(self):
+        """
+        Returns the moves that reverse the last move played and any
+        moves chained to it, in the order to play them (or an empty
+        list). Every move is reversed by swapping src and dst (see
+        rules.py).
+        """
+        moves = []
+        while self.can_undo():
+            self.cursor -= 1
+            packed = self.moves[self.cursor]
+            src, dst, count = unpack_move(packed)
+            moves.append((dst, src, count))
+            if not packed & CHAINED:
+                break
+        return moves
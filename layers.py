@@ -0,0 +1,50 @@
+MAX_CASCADE_LENGTH = 19 # 7 dealt cards, then a King down to a 2
+
+# Layers, back to front: one per cascade row (cards lower down a
+# cascade overlap those above), one per foundation value, then cells
+FIRST_FOUNDATION_LAYER = MAX_CASCADE_LENGTH
+CELL_LAYER = FIRST_FOUNDATION_LAYER + 13
+
+class DrawOrder(object):
+    """
+    The order cards are drawn in, kept separately from Board.cards.
+
+    Cards are grouped in layers, and a moved card is only taken out of
+    its old layer and added to the end of its new one; the full order
+    is only put back together (not sorted) when it is next asked for.
+    """
+    def __init__(self):
+        self.card_layers = {}
+        self.cards = []
+        self.changed = False
+        self.layers = [[] for n in range(CELL_LAYER + 1)]
+
+    def clear(self):
+        for layer in self.layers:
+            layer.clear()
+        self.card_layers = {}
+        self.cards = []
+
+    def get_cards(self):
+        """Returns cards in draw order, back to front"""
+        if self.changed:
+            self.cards = [card for layer in self.layers for card in layer]
+            self.changed = False
+        return self.cards
+
+    def move(self, card, layer):
+        old_layer = self.card_layers.get(card)
+        if old_layer is not None:
+            self.layers[old_layer].remove(card)
+        self.layers[layer].append(card)
+        self.card_layers[card] = layer
+        self.changed = True
+
+    def move_to_cascade(self, card, row):
+        self.move(card, row)
+
+    def move_to_cell(self, card):
+        self.move(card, CELL_LAYER)
+
+    def move_to_foundation(self, card):
+        self.move(card, FIRST_FOUNDATION_LAYER + card.value - 1)
@@ -1,18 +1,91 @@
-def init_log():
-    # Clear log file
-    open('log.txt', 'w+').close()
-
-def log(fn_name, string):
-    with open('log.txt') as file:
-        lines = [l for l in file.read().split('\n') if l != '\n']
-
-    with open('log.txt', 'a') as file:
-        fn_lines = [l for l in lines if 'fn [' in l]
-        if fn_lines:
-            most_recent_fn_name = fn_lines[-1].replace('fn [', '').replace(']', '')
-            if most_recent_fn_name == fn_name:
-                file.write(f'\n\t{string}')
-            else:
-                file.write(f'\n\nfn [{fn_name}]\n\t{string}')
-        else:
-            file.write(f'\n\nfn [{fn_name}]\n\t{string}')
+"""
+Grouped debug log. Lines are written under a 'fn [name]' header, which
+is only repeated when the function name changes:
+
+    fn [place_selected_card]
+        ...
+        ...
+
+log() only appends to an in-memory ring buffer; a background thread
+writes the buffer to log.txt, adding the headers as it goes. If the
+buffer fills up before it is flushed, the oldest lines are dropped, and
+the next flush notes how many.
+"""
+import atexit
+import collections
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING}
+
+BUFFER_SIZE = 10000
+FLUSH_INTERVAL = 0.5 # Seconds
+LOG_FILE = 'log.txt'
+
+buffer = collections.deque(maxlen=BUFFER_SIZE)
+dropped = 0
+flushed_dropped = 0 # dropped as of the last flush
+last_fn_name = None # Of the last header written
+level = DEBUG
+flush_lock = threading.Lock()
+flush_thread = None
+
+def flush():
+    """Writes everything buffered so far to the log file"""
+    global flushed_dropped, last_fn_name
+    with flush_lock:
+        lines = []
+        if dropped != flushed_dropped:
+            lines.append(f'\n\n... {dropped - flushed_dropped} lines dropped (log buffer full)')
+            flushed_dropped = dropped
+            # The header for the lines that are left may have gone too
+            last_fn_name = None
+        while buffer:
+            fn_name, string = buffer.popleft()
+            if fn_name != last_fn_name:
+                last_fn_name = fn_name
+                lines.append(f'\n\nfn [{fn_name}]')
+            lines.append(f'\n\t{string}')
+        if lines:
+            with open(LOG_FILE, 'a') as file:
+                file.write(''.join(lines))
+
+def flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        flush()
+
+def init_log(log_level=DEBUG):
+    """Clears the log file, sets the level and starts the flush thread"""
+    global dropped, flush_thread, flushed_dropped, last_fn_name, level
+    with flush_lock:
+        buffer.clear()
+        open(LOG_FILE, 'w+').close()
+        dropped = 0
+        flushed_dropped = 0
+        last_fn_name = None
+    level = log_level
+
+    if not flush_thread:
+        flush_thread = threading.Thread(target=flush_loop, name='logger', daemon=True)
+        flush_thread.start()
+
+def is_enabled(log_level):
+    """
+    Lets hot paths skip building log strings that would be thrown away
+    """
+    return log_level >= level
+
+def log(fn_name, string, log_level=DEBUG):
+    global dropped
+    if log_level < level:
+        return
+
+    if len(buffer) == BUFFER_SIZE:
+        dropped += 1
+    buffer.append((fn_name, string))
+
+atexit.register(flush)
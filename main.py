@@ -1,13 +1,41 @@
+import argparse
+import random
+import time
 import pygame
 import logger
+import tracing
+from assets import Assets
 from card import Card
 from cell import Cell
 from board import Board
 from controller import Controller
+from hint import HintEngine
+from profiler import FrameProfiler
+from renderer import Renderer
+from replay import record_game
+from rules import SUITS, GameState
+
+# What --trace records: hover navigation, move validation, moving cards
+# and the game state updates underneath them
+TRACED_METHODS = (
+    (Board, ('build_hover_graph', 'find_first_card_with_valid_move', 'find_first_valid_position_for_selected_card', 'find_hover_target_with_no_selection', 'find_hover_target_with_selection', 'get_destinations', 'get_run_size', 'handle_move_hover', 'move_cards', 'place_selected_card', 'select_hovered', 'set_base_vacancy', 'set_hover_from_selected', 'sync_location', 'update_highlights')),
+    (Card, ('update',)),
+    (GameState, ('apply', 'count_run_length', 'get_destinations', 'legal_moves', 'put', 'take')),
+)
 
 def close_menu():
     print('Menu closed')
 
+def create_board(assets, deck_pos=(0, 0)):
+    """Creates the cells and a full deck of cards at deck_pos"""
+    cells = [Cell(cell_type='cell', pos=n, col=0) for n in range(4)]
+    foundations = [Cell(cell_type='foundation', pos=n, col=9, suit=SUITS[n]) for n in range(4)]
+    bases = [Cell(cell_type='base', pos=n, col=n+1) for n in range(8)]
+
+    cards = [Card(pos=deck_pos, card=n, assets=assets) for n in range(52)]
+
+    return Board(cards, foundations, cells, bases, assets)
+
 def open_menu():
     print('Menu open')
 
@@ -25,10 +53,16 @@ def win():
     GAME_IN_PROGRESS = False
     print('You win!')
 
-def main():
+def main(deal_number=None, replay_moves=None, log_level=logger.DEBUG):
+    if deal_number is None:
+        deal_number = random.randint(1, 32000)
+
+    # Started before pygame, so the worker process has nothing of it
+    hints = HintEngine()
+
     screen_dims = (240, 160)
     pygame.init()
-    pygame.display.set_caption('GBA Freecell')
+    pygame.display.set_caption(f'GBA Freecell #{deal_number}')
     screen = pygame.display.set_mode(screen_dims)
 
     controller = Controller() # Input device
@@ -37,17 +71,25 @@ def main():
     dpad_repeat_start_delay = 250
     dpad_repeat_delay = 50
 
-    logger.init_log()
+    logger.init_log(log_level)
 
     clock = pygame.time.Clock()
     fps = 0
-    deal_event = pygame.USEREVENT + 1
+    deal_interval = 0.05 # Seconds between cards; 0 deals instantly
+    solve_event = pygame.USEREVENT + 2
+    solve_move_delay = 200
+    solution = []
+    solving = False
 
     c_transparent = pygame.Color('#ff00ff')
+    assets = Assets(c_transparent)
+    startup_start = pygame.time.get_ticks()
 
     background = pygame.Surface(screen_dims)
-    board_bmp = pygame.image.load('board.bmp')
-    background.blit(board_bmp, (0, 0))
+    background.blit(assets.get_image('board.bmp'), (0, 0))
+    renderer = Renderer(screen, background)
+    profiler = FrameProfiler() # F3 shows timings, F4 exports them
+    renderer.profiler = profiler
 
     global INPUT_ENABLED
     global GAME_IN_PROGRESS
@@ -60,39 +102,58 @@ def main():
 
     # Card dims: 19 x 28
     deck_pos = (screen_dims[0] / 2 - 10, screen_dims[1] - 28 - 6)
-    card_back = pygame.image.load('card_back.bmp')
-    card_back.set_colorkey(c_transparent)
+    card_back = assets.get_image('card_back.bmp', transparent=True)
 
-    suits = ('spades', 'clubs', 'diamonds', 'hearts')
-    cells = [Cell(cell_type='cell', pos=n, col=0) for n in range(4)]
-    foundations = [Cell(cell_type='foundation', pos=n, col=9, suit=suits[n]) for n in range(4)]
-    bases = [Cell(cell_type='base', pos=n, col=n+1) for n in range(8)]
-
-    cards = []
-    for val in range(1, 14):
-        for suit in suits:
-            cards.append(
-                Card(pos=deck_pos, transparent=c_transparent, value=val, suit=suit, suits=suits))
-
-    board = Board(cards, foundations, cells, bases, c_transparent)
-    board.shuffle()
-    board.initialize_card_cols()
+    board = create_board(assets, deck_pos)
+    board.hints = hints
+    logger.log('main', f'Startup took {pygame.time.get_ticks() - startup_start}ms; {assets.report()}', logger.INFO)
+    board.initialize_card_cols(deal_number)
     board.initialize_card_target_positions()
-    board.deal(deal_event)
-    board.reset_tableaux()
+    board.deal(deal_interval)
 
     is_running = True
+    idle = False
 
     while is_running:
-        clock.tick(60)
+        if idle:
+            # Nothing is moving, so sleep until there is input or a
+            # timer (D-pad repeat, solver playback) fires
+            events = [pygame.event.wait()] + pygame.event.get()
+            clock.tick()
+            # Time spent asleep shouldn't count towards animations
+            # started by these events
+            dt = 0
+        else:
+            dt = clock.tick(60) / 1000
+            events = pygame.event.get()
         fps = clock.get_fps()
+        profiler.begin_frame()
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 is_running = False
 
-            elif event.type == deal_event:
-                board.deal(deal_event)
+            # The window was uncovered or restored, so what's on screen
+            # can't be trusted: only dirty areas get redrawn otherwise
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE):
+                renderer.full_redraw = True
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                path = f'profile_{time.strftime("%Y%m%d-%H%M%S")}.csv'
+                profiler.export(path)
+                print(f'Frame times saved to {path}', ', '.join(f'{k} {v:.2f}ms' for k, v in profiler.get_percentiles().items()))
+
+            elif event.type == solve_event:
+                # Play back the solver's moves one at a time
+                board.apply_move(solution.pop(0))
+                if solution:
+                    pygame.time.set_timer(solve_event, solve_move_delay, True)
+                else:
+                    INPUT_ENABLED = True
+                    if board.state.is_won():
+                        win()
 
             elif event.type == dpad_repeat_event:
                 try:
@@ -108,11 +169,26 @@ def main():
                 if INPUT_ENABLED:
                     input_event = controller.get_action_button(event)
 
-                if input_event == 'A press':
+                if input_event == 'START press':
+                    toggle_menu()
+
+                elif MENU_OPEN:
+                    # Solve is the only menu entry so far
+                    if input_event == 'A press':
+                        toggle_menu()
+                        if board.selected_card:
+                            board.deselect()
+                        # Solved in the hints worker, so the window
+                        # keeps running; input waits for the result
+                        hints.solve(board.state)
+                        solving = True
+                        INPUT_ENABLED = False
+                        print('Solving...')
+
+                elif input_event == 'A press':
                     if board.selected_card:
                         # Should always be over a valid move
-                        board.place_selected_card()
-                        board.set_cards_z_index()
+                        board.place_selected_card(auto_play=True)
                     else:
                         # Should always be over a valid card to move
                         board.select_hovered()
@@ -121,6 +197,25 @@ def main():
                     if board.selected_card:
                         board.deselect()
 
+                elif input_event == 'SELECT press':
+                    # Hints are worked out in the background, so this
+                    # never waits
+                    hint = hints.get_hint()
+                    if hint:
+                        if board.selected_card:
+                            board.deselect()
+                        board.show_hint(hint)
+                    else:
+                        print('No hint yet')
+
+                elif input_event in ('L press', 'R press'):
+                    if board.selected_card:
+                        board.deselect()
+                    if input_event == 'L press':
+                        board.undo()
+                    else:
+                        board.redo()
+
                 elif input_event == 'D-PAD UP press':
                     board.handle_move_hover(direction='up')
                     pygame.time.set_timer(dpad_repeat_event, dpad_repeat_start_delay, True)
@@ -137,40 +232,87 @@ def main():
                 elif input_event in ('D-PAD UP release', 'D-PAD RIGHT release', 'D-PAD DOWN release', 'D-PAD LEFT release'):
                     held_dpad_direction = None
 
-                elif input_event == 'SPACE press':
-                    toggle_menu()
-
-        # Draw background (board)
-        screen.blit(background, (0, 0))
+        profiler.mark('events')
+
+        if not DEALING:
+            board.update_highlights()
+
+        if solving:
+            result = hints.get_solution()
+            if result:
+                solving = False
+                solution, nodes = result
+                if solution:
+                    print(f'Solved in {len(solution)} moves ({nodes} positions searched)')
+                    pygame.time.set_timer(solve_event, solve_move_delay, True)
+                else:
+                    print(f'No solution found ({nodes} positions searched)')
+                    solution = []
+                    INPUT_ENABLED = True
+
+        # Start any animations now due, then move all animating cards
+        # along in one step
+        board.schedule.update(dt)
+        board.tweens.update(dt)
+        profiler.mark('board')
 
-        # Draw cards
         for card in board.cards:
-            if not DEALING:
-                board.update_highlights()
             card.update()
-            screen.blit(card.surf, card.pos)
+        profiler.mark('cards')
+
+        # Draw cards
+        sprites = [(card, card.surf, card.pos) for card in board.draw_order.get_cards()]
 
         # Draw hover markers, if applicable
         if board.selected_card:
             for n in range(len(board.hover_markers)):
-                screen.blit(board.hover_markers[n], (board.hover_marker_positions[n]))
+                sprites.append((f'hover marker {n}', board.hover_markers[n], board.hover_marker_positions[n]))
 
         # Draw card back 'deck' while dealing
         if DEALING:
-            if [c for c in board.cards if c.pos != c.target_pos and not c.animating]:
-                screen.blit(card_back, deck_pos)
+            if board.schedule.is_pending():
+                sprites.append(('deck', card_back, deck_pos))
             # Unset DEALING flag when cards are done animating
-            cards_animating = [c for c in board.cards if c.animating]
-            if not cards_animating:
+            if not board.is_dealing():
                 DEALING = False
                 INPUT_ENABLED = True
                 # Select bottom card in first cascade
                 board.hover_last_card_in_cascade(1)
+                if replay_moves:
+                    # Play back a recorded game like a solution
+                    solution = list(replay_moves)
+                    INPUT_ENABLED = False
+                    pygame.time.set_timer(solve_event, solve_move_delay, True)
+
+        if profiler.show_overlay:
+            sprites.append(('profiler', profiler.get_overlay(fps), (0, 0)))
+
+        # Redraw and update only what changed
+        renderer.draw(sprites)
+        profiler.end_frame()
+
+        # Keep polling for the solver's answer while it works
+        idle = not DEALING and not solving and not board.tweens.is_animating()
+
+    hints.close()
 
-        pygame.display.update()
+    if board.journal.can_undo():
+        path = record_game(board.deal_number, board.journal.get_moves())
+        logger.log('main', f'Game saved to {path}', logger.INFO)
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='GBA Freecell')
+    parser.add_argument('deal_number', type=int, nargs='?', help='e.g. 11982 (random if not given)')
+    parser.add_argument('--trace', metavar='PATH', help='save a Chrome trace of board hot paths to PATH')
+    parser.add_argument('--trace-sample', type=float, default=1.0, help='fraction of outermost calls to trace')
+    parser.add_argument('--log-level', choices=logger.LEVELS, default='debug', help='lowest level written to log.txt')
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable(TRACED_METHODS, args.trace_sample)
+    main(args.deal_number, log_level=logger.LEVELS[args.log_level])
+    if args.trace:
+        print(f'{tracing.save(args.trace)} spans saved to {args.trace}')
 
 """
 TODO
@@ -178,12 +320,14 @@ TODO
 
 - Wrap L/R hover moves around screen
 - After moving a card to a foundation, set hover back to the last card in the column the card came from (if it has a move; if not, the next closest one)
-- Update board.get_cascade_offset_from_card() when cascades get too long
+- Update board.get_cascade_position() when cascades get too long
 - Menu
     - Show menu interface
-    - Solve
+    - Solve - DONE (A in menu; needs menu interface)
     - New game
     - Statistics
+- Undo / redo - DONE (L / R)
+- Hints - DONE (SELECT)
 - Controller support
     1. Selection graphics - DONE
     2. Arrow / WASD input - DONE
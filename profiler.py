@@ -0,0 +1,102 @@
+"""
+Frame time profiler. Each frame is split into phases, timed from one
+mark() to the next:
+
+    events:  handling input and timer events
+    board:   highlights and advancing animations
+    cards:   Card.update()
+    blit:    working out dirty areas and blitting
+    display: pygame.display.update()
+
+Time spent sleeping (frame limiting, or waiting for input when idle) is
+not part of any frame.
+
+The last WINDOW frames are kept for the overlay's rolling percentiles,
+and up to HISTORY frames for export().
+"""
+import collections
+import csv
+import time
+import pygame
+
+PHASES = ('events', 'board', 'cards', 'blit', 'display')
+HISTORY = 36000 # 10 minutes at 60fps
+OVERLAY_INTERVAL = 30 # Frames between overlay refreshes
+WINDOW = 600
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+class FrameProfiler(object):
+    def __init__(self):
+        self.font = None
+        self.frame = None
+        self.frame_count = 0
+        self.frame_start = 0
+        self.history = collections.deque(maxlen=HISTORY)
+        self.last_mark = 0
+        self.overlay = None
+        self.show_overlay = False
+        self.window = collections.deque(maxlen=WINDOW)
+
+    def begin_frame(self):
+        self.frame = [0] * len(PHASES)
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def end_frame(self):
+        """Records the frame as (total, *phases), in ms"""
+        record = ((self.last_mark - self.frame_start) * 1000,) + tuple(t * 1000 for t in self.frame)
+        self.history.append(record)
+        self.window.append(record)
+        self.frame_count += 1
+
+    def export(self, path):
+        """Writes every recorded frame to a CSV file"""
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame', 'total_ms'] + [f'{phase}_ms' for phase in PHASES])
+            first = self.frame_count - len(self.history)
+            for n, record in enumerate(self.history):
+                writer.writerow([first + n] + [f'{t:.4f}' for t in record])
+
+    def get_overlay(self, fps):
+        """
+        Returns a surface showing rolling frame time percentiles and
+        the mean time per phase. It's only re-rendered every
+        OVERLAY_INTERVAL frames.
+        """
+        if self.overlay and self.frame_count % OVERLAY_INTERVAL:
+            return self.overlay
+        if not self.font:
+            self.font = pygame.font.Font(None, 12)
+
+        totals = sorted(r[0] for r in self.window)
+        count = len(self.window) or 1
+        means = [sum(r[n + 1] for r in self.window) / count for n in range(len(PHASES))]
+        lines = [
+            f'{fps:.0f}fps p50 {percentile(totals, 50):.2f} p95 {percentile(totals, 95):.2f} p99 {percentile(totals, 99):.2f}ms',
+            ' '.join(f'{phase[:3]} {mean:.2f}' for phase, mean in zip(PHASES, means)),
+        ]
+        surfs = [self.font.render(line, False, (255, 255, 255), (0, 0, 0)) for line in lines]
+        self.overlay = pygame.Surface((max(s.get_width() for s in surfs), sum(s.get_height() for s in surfs)))
+        y = 0
+        for surf in surfs:
+            self.overlay.blit(surf, (0, y))
+            y += surf.get_height()
+        return self.overlay
+
+    def get_percentiles(self):
+        totals = sorted(r[0] for r in self.window)
+        return {f'p{p}': percentile(totals, p) for p in (50, 95, 99)}
+
+    def mark(self, phase):
+        """Ends phase: the time since the last mark is added to it"""
+        now = time.perf_counter()
+        self.frame[PHASES.index(phase)] += now - self.last_mark
+        self.last_mark = now
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
@@ -0,0 +1,86 @@
+import pygame
+
+class Renderer(object):
+    """
+    Draws sprites over a static background, only redrawing and updating
+    the parts of the screen that changed since the last frame.
+
+    A sprite is a (key, surf, pos) tuple; key identifies it between
+    frames (e.g. the Card itself). A sprite is dirty when it appears,
+    disappears, moves or has its surface swapped (e.g. on highlight).
+    """
+    def __init__(self, screen, background):
+        self.background = background
+        self.drawn = {}
+        self.full_redraw = True
+        # Optional profiler.FrameProfiler, to time blitting and display
+        # updates separately
+        self.profiler = None
+        self.screen = screen
+
+    def draw(self, sprites):
+        """
+        Draws sprites (in order, back to front) and updates the display.
+        Returns the list of rects that were redrawn.
+        """
+        current = {}
+        dirty = []
+        for key, surf, pos in sprites:
+            rect = surf.get_rect(topleft=pos)
+            current[key] = (surf, rect)
+            previous = self.drawn.get(key)
+            if previous is None:
+                dirty.append(rect)
+            elif previous[0] is not surf or previous[1] != rect:
+                dirty.append(rect)
+                dirty.append(previous[1])
+        for key, (surf, rect) in self.drawn.items():
+            if key not in current:
+                dirty.append(rect)
+        self.drawn = current
+
+        if self.full_redraw:
+            self.full_redraw = False
+            self.screen.blit(self.background, (0, 0))
+            for key, surf, pos in sprites:
+                self.screen.blit(surf, pos)
+            if self.profiler:
+                self.profiler.mark('blit')
+            pygame.display.update()
+            if self.profiler:
+                self.profiler.mark('display')
+            return [self.screen.get_rect()]
+
+        if not dirty:
+            return dirty
+
+        dirty = self.merge_rects(dirty)
+        for area in dirty:
+            # Clip to the dirty area so sprites partly inside it don't
+            # paint over anything outside it
+            self.screen.set_clip(area)
+            self.screen.blit(self.background, area, area)
+            for key, surf, pos in sprites:
+                if area.colliderect(current[key][1]):
+                    self.screen.blit(surf, pos)
+        self.screen.set_clip(None)
+        if self.profiler:
+            self.profiler.mark('blit')
+        pygame.display.update(dirty)
+        if self.profiler:
+            self.profiler.mark('display')
+        return dirty
+
+    def merge_rects(self, rects):
+        """
+        Merges overlapping rects, so no area is drawn twice in a frame
+        """
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            overlapping = rect.collidelist(merged)
+            while overlapping != -1:
+                rect.union_ip(merged.pop(overlapping))
+                overlapping = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
@@ -0,0 +1,102 @@
+"""
+Game recordings: the deal number and the moves played, 2 bytes a move
+(packed as in journal.py). Every game played in main.py is saved to
+REPLAY_DIR when the window is closed.
+
+Play a recording back in the game window at normal speed:
+
+    python replay.py replays/11982_20260101-120000.rpl
+
+Or run any number of recordings through the board logic headless, as
+fast as possible, checking every move is legal:
+
+    python replay.py --fast replays/*.rpl
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+from array import array
+import pygame
+from assets import Assets
+from journal import pack_move, unpack_move
+
+MAGIC = b'FCR1'
+HEADER = struct.Struct('<4sI') # Magic, deal number
+REPLAY_DIR = 'replays'
+
+def load_replay(path):
+    """Returns (deal number, list of moves) from a recording"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    magic, deal_number = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a replay file')
+    moves = array('H', data[HEADER.size:])
+    if sys.byteorder == 'big':
+        moves.byteswap()
+    return deal_number, [unpack_move(m) for m in moves]
+
+def save_replay(path, deal_number, moves):
+    packed = array('H', [pack_move(m) for m in moves])
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, deal_number))
+        file.write(packed.tobytes())
+
+def record_game(deal_number, moves):
+    """Saves a game to a new file in REPLAY_DIR and returns its path"""
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    path = os.path.join(REPLAY_DIR, f'{deal_number}_{time.strftime("%Y%m%d-%H%M%S")}.rpl')
+    save_replay(path, deal_number, moves)
+    return path
+
+def play_fast(paths):
+    """
+    Plays recordings through the board with no window, animation or
+    frame limit. Returns the number of recordings that failed.
+    """
+    import main # main records games with this module
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+    pygame.display.set_mode((240, 160))
+    assets = Assets(pygame.Color('#ff00ff'))
+
+    failed = 0
+    total_moves = 0
+    start = time.perf_counter()
+    for path in paths:
+        deal_number, moves = load_replay(path)
+        board = main.create_board(assets)
+        board.initialize_card_cols(deal_number)
+        board.initialize_card_target_positions()
+        board.deal(0)
+        board.hover_last_card_in_cascade(1)
+
+        for n, move in enumerate(moves):
+            if not board.state.is_legal(move):
+                print(f'{path}: move {n + 1} {move} is not legal')
+                failed += 1
+                break
+            board.apply_move(move)
+            total_moves += 1
+
+    seconds = time.perf_counter() - start
+    print(f'{len(paths)} games, {total_moves} moves in {seconds:.2f}s ({total_moves / seconds:.0f} moves/s), {failed} failed')
+    return failed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play back recorded games')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--fast', action='store_true', help='headless, as fast as possible')
+    args = parser.parse_args()
+
+    if args.fast:
+        sys.exit(1 if play_fast(args.paths) else 0)
+
+    import main
+    deal_number, moves = load_replay(args.paths[0])
+    main.main(deal_number, replay_moves=moves)
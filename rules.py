@@ -0,0 +1,356 @@
+"""
+FreeCell rules, with no pygame dependency, so game logic can run
+headless (solving, batch runs, tests).
+
+Cards are ints from 0 to 51: (value - 1) * 4 + suit index, with suits
+indexed as in SUITS. Black suits come first, so a card is red when its
+suit index is 2 or more (bit 1 of the card is set). Values, suits and
+labels are looked up in tables rather than worked out.
+
+Locations are ints too:
+    0-7:   cascades
+    8-11:  free cells
+    12-15: foundations (one per suit, in SUITS order)
+
+A move is a (src, dst, count) tuple. Every move can be reversed by
+swapping src and dst, so undo needs no extra bookkeeping. apply()
+assumes cards moved between cascades form a valid run, which is true
+of legal moves and of their undos.
+
+Each state keeps a Zobrist hash that is updated as cards move. A card in
+a cascade is hashed by the card it sits on rather than by its column,
+and a card in a free cell by the card alone, so states that differ only
+in the order of their cascades or free cells hash the same.
+"""
+import random
+
+SUITS = ('spades', 'clubs', 'diamonds', 'hearts')
+VALUE_LABELS = [0, 'A', 2, 3, 4, 5, 6, 7, 8, 9, 10, 'J', 'Q', 'K']
+
+NUM_CASCADES = 8
+NUM_CELLS = 4
+FIRST_CELL = 8
+FIRST_FOUNDATION = 12
+
+# Zobrist keys. Fixed seed, so hashes match across runs and processes.
+# ZOBRIST_CASCADE[card][onto] is for card sitting on onto; onto is 52
+# when card is at the top of its cascade.
+_zobrist_random = random.Random(0x5eed)
+ZOBRIST_CASCADE = [[_zobrist_random.getrandbits(64) for onto in range(53)] for card in range(52)]
+ZOBRIST_CELL = [_zobrist_random.getrandbits(64) for card in range(52)]
+ZOBRIST_FOUNDATION = [_zobrist_random.getrandbits(64) for card in range(52)]
+NO_CARD = 52
+
+# Per-card lookup tables, indexed by card
+CARD_VALUES = bytes(card // 4 + 1 for card in range(52))
+CARD_SUITS = bytes(card % 4 for card in range(52))
+CARD_LABELS = tuple(f'{VALUE_LABELS[card // 4 + 1]}{SUITS[card % 4][0].upper()}' for card in range(52))
+
+def make_card(value, suit_index):
+    return (value - 1) * 4 + suit_index
+
+def card_value(card):
+    return CARD_VALUES[card]
+
+def card_suit(card):
+    return CARD_SUITS[card]
+
+def is_red(card):
+    return card & 2 != 0
+
+def is_red_suit(suit_index):
+    return suit_index >= 2
+
+def can_stack(card, onto):
+    """
+    True if card can be placed on onto at the bottom of a cascade: onto
+    is one value higher (cards go up in steps of 4) and the opposite
+    color (bit 1 of the suit index)
+    """
+    return onto >> 2 == (card >> 2) + 1 and (card ^ onto) & 2 != 0
+
+def card_label(card):
+    return CARD_LABELS[card]
+
+def is_cascade(location):
+    return location < FIRST_CELL
+
+def is_cell(location):
+    return FIRST_CELL <= location < FIRST_FOUNDATION
+
+def is_foundation(location):
+    return location >= FIRST_FOUNDATION
+
+class GameState(object):
+    def __init__(self):
+        self.cascades = [[] for n in range(NUM_CASCADES)]
+        self.cells = [None] * NUM_CELLS
+        # Value of the top card on each foundation (0 when empty)
+        self.foundations = [0] * len(SUITS)
+        self.hash = 0
+        # Length of the valid tableau at the bottom of each cascade,
+        # kept current by take() and put()
+        self.run_lengths = [0] * NUM_CASCADES
+        # Bumped by every apply(); legal move caches are only valid for
+        # the version they were built at
+        self.version = 0
+        self.destinations = {}
+        self.destinations_version = -1
+        self.moves = []
+        self.moves_version = -1
+
+    @classmethod
+    def from_deal(cls, cards):
+        """
+        Deals cards (ints, in deal order) left to right across the
+        cascades, one row at a time.
+        """
+        state = cls()
+        for i, card in enumerate(cards):
+            state.cascades[i % NUM_CASCADES].append(card)
+        state.hash = state.compute_hash()
+        state.run_lengths = [state.count_run_length(n) for n in range(NUM_CASCADES)]
+        return state
+
+    @classmethod
+    def unpack(cls, data, state_hash=None, run_lengths=None):
+        """
+        Rebuilds a state from the bytes returned by pack(). state_hash and
+        run_lengths, if the caller kept them, save working them out
+        again.
+        """
+        state = cls()
+        cascade = 0
+        for n in data[:-8]:
+            if n == NO_CARD:
+                cascade += 1
+            else:
+                state.cascades[cascade].append(n)
+        state.cells = [c if c != NO_CARD else None for c in data[-8:-4]]
+        state.foundations = list(data[-4:])
+        state.hash = state.compute_hash() if state_hash is None else state_hash
+        if run_lengths is None:
+            state.run_lengths = [state.count_run_length(n) for n in range(NUM_CASCADES)]
+        else:
+            state.run_lengths = list(run_lengths)
+        return state
+
+    def apply(self, move):
+        """Applies move without checking that it is legal"""
+        src, dst, count = move
+        self.put(dst, self.take(src, count))
+        self.version += 1
+
+    def compute_hash(self):
+        """Hashes the state from scratch (apply() keeps self.hash current)"""
+        h = 0
+        for cascade in self.cascades:
+            onto = NO_CARD
+            for card in cascade:
+                h ^= ZOBRIST_CASCADE[card][onto]
+                onto = card
+        for card in self.cells:
+            if card is not None:
+                h ^= ZOBRIST_CELL[card]
+        for suit, value in enumerate(self.foundations):
+            for card in range(suit, make_card(value, suit) + 1, 4):
+                h ^= ZOBRIST_FOUNDATION[card]
+        return h
+
+    def copy(self):
+        state = GameState()
+        state.cascades = [list(cascade) for cascade in self.cascades]
+        state.cells = list(self.cells)
+        state.foundations = list(self.foundations)
+        state.hash = self.hash
+        state.run_lengths = list(self.run_lengths)
+        return state
+
+    def count_run_length(self, index):
+        """Works out the length of a cascade's bottom run from scratch"""
+        cascade = self.cascades[index]
+        if not cascade:
+            return 0
+        length = 1
+        for n in range(len(cascade) - 1, 0, -1):
+            if not can_stack(cascade[n], cascade[n - 1]):
+                break
+            length += 1
+        return length
+
+    def get_cards(self, location):
+        """Returns the cards at a location, top to bottom"""
+        if is_cascade(location):
+            return self.cascades[location]
+        if is_cell(location):
+            card = self.cells[location - FIRST_CELL]
+            return [card] if card is not None else []
+        suit = location - FIRST_FOUNDATION
+        return [make_card(value, suit) for value in range(1, self.foundations[suit] + 1)]
+
+    def get_destinations(self, src, count):
+        """
+        Returns the locations count cards at src can legally move to.
+        Built from legal_moves() once per state version.
+        """
+        if self.destinations_version != self.version:
+            self.destinations = {}
+            for move_src, dst, move_count in self.legal_moves():
+                self.destinations.setdefault((move_src, move_count), []).append(dst)
+            self.destinations_version = self.version
+        return self.destinations.get((src, count), [])
+
+    def get_empty_cascade_count(self):
+        return len([c for c in self.cascades if not c])
+
+    def get_free_cell_count(self):
+        return self.cells.count(None)
+
+    def get_last_card(self, location):
+        """Returns the card that would move from location, or None"""
+        if is_cascade(location):
+            cascade = self.cascades[location]
+            return cascade[-1] if cascade else None
+        if is_cell(location):
+            return self.cells[location - FIRST_CELL]
+        suit = location - FIRST_FOUNDATION
+        value = self.foundations[suit]
+        return make_card(value, suit) if value else None
+
+    def get_run_length(self, index):
+        """Length of the valid tableau at the bottom of a cascade"""
+        return self.run_lengths[index]
+
+    def is_legal(self, move):
+        return move in self.legal_moves()
+
+    def is_won(self):
+        return sum(self.foundations) == 52
+
+    def legal_moves(self):
+        """
+        Lists every legal move, in a single pass over the state. Moves to
+        each empty cell and each empty cascade are listed separately,
+        since they are different places to the player. The list is
+        cached until the next move, so don't modify it.
+        """
+        if self.moves_version == self.version:
+            return self.moves
+
+        moves = []
+        free_cells = [FIRST_CELL + i for i, c in enumerate(self.cells) if c is None]
+        empty_cascades = [i for i, c in enumerate(self.cascades) if not c]
+        bottoms = [(i, c[-1]) for i, c in enumerate(self.cascades) if c]
+        max_run = (len(free_cells) + 1) * (len(empty_cascades) + 1)
+        max_run_to_empty = (len(free_cells) + 1) * len(empty_cascades)
+
+        # Cascades
+        for src, cascade in enumerate(self.cascades):
+            if not cascade:
+                continue
+            card = cascade[-1]
+            if self.foundations[card_suit(card)] == card_value(card) - 1:
+                moves.append((src, FIRST_FOUNDATION + card_suit(card), 1))
+            for cell in free_cells:
+                moves.append((src, cell, 1))
+            run_length = self.get_run_length(src)
+            for count in range(1, run_length + 1):
+                top = cascade[-count]
+                if count <= max_run:
+                    for dst, bottom in bottoms:
+                        if dst != src and can_stack(top, bottom):
+                            moves.append((src, dst, count))
+                # Moving a whole cascade to an empty one changes nothing
+                if count <= max_run_to_empty and count < len(cascade):
+                    for dst in empty_cascades:
+                        moves.append((src, dst, count))
+
+        # Free cells
+        for i, card in enumerate(self.cells):
+            if card is None:
+                continue
+            src = FIRST_CELL + i
+            if self.foundations[card_suit(card)] == card_value(card) - 1:
+                moves.append((src, FIRST_FOUNDATION + card_suit(card), 1))
+            for dst, bottom in bottoms:
+                if can_stack(card, bottom):
+                    moves.append((src, dst, 1))
+            for dst in empty_cascades:
+                moves.append((src, dst, 1))
+
+        # Foundations (cards can be taken back off)
+        for suit, value in enumerate(self.foundations):
+            if not value:
+                continue
+            card = make_card(value, suit)
+            src = FIRST_FOUNDATION + suit
+            for cell in free_cells:
+                moves.append((src, cell, 1))
+            for dst, bottom in bottoms:
+                if can_stack(card, bottom):
+                    moves.append((src, dst, 1))
+            for dst in empty_cascades:
+                moves.append((src, dst, 1))
+
+        self.moves = moves
+        self.moves_version = self.version
+        return moves
+
+    def pack(self):
+        """
+        Compact encoding of the state: the cascades separated by 52s,
+        then the cells (52 for empty) and foundation values. At most 68
+        bytes.
+        """
+        data = []
+        for cascade in self.cascades:
+            data += cascade
+            data.append(NO_CARD)
+        data += [c if c is not None else NO_CARD for c in self.cells]
+        data += self.foundations
+        return bytes(data)
+
+    def put(self, location, cards):
+        if is_cascade(location):
+            cascade = self.cascades[location]
+            self.hash ^= ZOBRIST_CASCADE[cards[0]][cascade[-1] if cascade else NO_CARD]
+            if cascade and can_stack(cards[0], cascade[-1]):
+                self.run_lengths[location] += len(cards)
+            else:
+                self.run_lengths[location] = len(cards)
+            cascade += cards
+        elif is_cell(location):
+            self.cells[location - FIRST_CELL] = cards[0]
+            self.hash ^= ZOBRIST_CELL[cards[0]]
+        else:
+            self.foundations[location - FIRST_FOUNDATION] += 1
+            self.hash ^= ZOBRIST_FOUNDATION[cards[0]]
+
+    def take(self, location, count):
+        """Removes and returns the bottom count cards at location"""
+        if is_cascade(location):
+            cascade = self.cascades[location]
+            cards = cascade[-count:]
+            del cascade[-count:]
+            # Only the top card of a run changes what it sits on
+            self.hash ^= ZOBRIST_CASCADE[cards[0]][cascade[-1] if cascade else NO_CARD]
+            if count < self.run_lengths[location]:
+                self.run_lengths[location] -= count
+            else:
+                # The cards left at the bottom may now form a longer run
+                self.run_lengths[location] = self.count_run_length(location)
+            return cards
+        if is_cell(location):
+            i = location - FIRST_CELL
+            card = self.cells[i]
+            self.cells[i] = None
+            self.hash ^= ZOBRIST_CELL[card]
+            return [card]
+        card = self.get_last_card(location)
+        self.foundations[location - FIRST_FOUNDATION] -= 1
+        self.hash ^= ZOBRIST_FOUNDATION[card]
+        return [card]
+
+    def undo(self, move):
+        src, dst, count = move
+        self.apply((dst, src, count))
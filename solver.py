@@ -0,0 +1,209 @@
+"""
+Best-first FreeCell solver. Works on rules.GameState only, so it runs
+headless; the moves it returns can be played on a Board with
+Board.apply_move().
+"""
+import heapq
+import itertools
+from rules import FIRST_FOUNDATION, GameState, can_stack, card_suit, card_value, is_cascade, is_cell, is_foundation, is_red_suit
+
+def get_safe_foundation_moves(state):
+    """
+    Repeatedly moves cards to the foundations while doing so can never
+    block the game, and returns the moves made. A card is safe to play
+    if both foundations of the opposite color are at least one value
+    below it, and the other foundation of its own color at least two.
+    """
+    moves = []
+    found = True
+    while found:
+        found = False
+        for location in range(FIRST_FOUNDATION):
+            card = state.get_last_card(location)
+            if card is None or not is_safe_foundation_card(state, card):
+                continue
+            move = (location, FIRST_FOUNDATION + card_suit(card), 1)
+            state.apply(move)
+            moves.append(move)
+            found = True
+    return moves
+
+def is_safe_foundation_card(state, card):
+    suit = card_suit(card)
+    value = card_value(card)
+    if state.foundations[suit] != value - 1:
+        return False
+    if value <= 2:
+        return True
+    for other, other_value in enumerate(state.foundations):
+        if other == suit:
+            continue
+        if is_red_suit(other) != is_red_suit(suit) and other_value < value - 1:
+            return False
+        if is_red_suit(other) == is_red_suit(suit) and other_value < value - 2:
+            return False
+    return True
+
+def score(state):
+    """
+    Estimated distance to a win (lower is better). Counts cards not on
+    foundations, breaks in cascade order, how deep the next card each
+    foundation needs is buried, and the space left to work with.
+    """
+    h = (52 - sum(state.foundations)) * 2
+    # The next card each foundation needs ((value - 1) * 4 + suit, with
+    # value one past the foundation's top card)
+    needed = {value * 4 + suit for suit, value in enumerate(state.foundations)}
+
+    for cascade in state.cascades:
+        # Breaks in order
+        for onto, card in zip(cascade, cascade[1:]):
+            if not can_stack(card, onto):
+                h += 1
+        # Cards covering the next card needed on its foundation
+        for depth, card in enumerate(cascade):
+            if card in needed:
+                h += len(cascade) - depth - 1
+
+    h += (len(state.cells) - state.get_free_cell_count()) * 3
+    h -= state.get_empty_cascade_count() * 3
+    return h
+
+class TranspositionTable(object):
+    """
+    Positions already reached, keyed by GameState.hash (which is the
+    same for cascade and free cell permutations), with the number of
+    moves it took to reach them. Holds at most capacity entries; when
+    full, the oldest half is dropped, since old entries are the least
+    likely to come up again in a best-first search.
+    """
+    def __init__(self, capacity=1000000):
+        self.capacity = capacity
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def store(self, key, depth):
+        """
+        Records key as reached in depth moves. Returns False if it was
+        already reached in as few moves, in which case it isn't worth
+        searching again.
+        """
+        known = self.entries.get(key)
+        if known is not None and known <= depth:
+            return False
+        if len(self.entries) >= self.capacity:
+            self.entries = dict(itertools.islice(self.entries.items(), self.capacity // 2, None))
+        self.entries[key] = depth
+        return True
+
+class Solver(object):
+    STOP_CHECK_INTERVAL = 256 # Nodes
+
+    def __init__(self, max_nodes=100000, table_size=1000000, should_stop=None):
+        self.max_nodes = max_nodes
+        self.nodes_expanded = 0
+        # Optional fn polled during the search; if it returns True the
+        # search gives up (e.g. the position it was asked about is gone)
+        self.should_stop = should_stop
+        self.stopped = False
+        # True if the last search hit max_nodes, rather than finding a
+        # solution or running out of positions to try
+        self.gave_up = False
+        self.table_size = table_size
+
+    def get_best_move(self, state):
+        """
+        Returns the move that leads to the best scoring position, or
+        None if there are no moves. Used when there is no time (or no
+        way) to find a full solution.
+        """
+        best = None
+        for move in self.get_moves(state):
+            state.apply(move)
+            h = score(state)
+            state.undo(move)
+            if best is None or h < best[0]:
+                best = (h, move)
+        return best[1] if best else None
+
+    def get_moves(self, state):
+        """
+        Legal moves worth searching. Cards never come back off the
+        foundations, and only the first free cell and first empty
+        cascade are tried, since the others lead to equivalent states.
+        """
+        moves = []
+        first_cell = None
+        first_empty = None
+        for move in state.legal_moves():
+            src, dst, count = move
+            if is_foundation(src):
+                continue
+            if is_cell(dst):
+                if first_cell is None:
+                    first_cell = dst
+                if dst != first_cell:
+                    continue
+            elif is_cascade(dst) and not state.cascades[dst]:
+                if first_empty is None:
+                    first_empty = dst
+                if dst != first_empty:
+                    continue
+            moves.append(move)
+        return moves
+
+    def solve(self, state):
+        """
+        Returns a list of moves that wins the game from state, or None
+        if no solution was found within max_nodes expansions (or the
+        search was stopped). state is not modified.
+        """
+        self.nodes_expanded = 0
+        self.stopped = False
+        self.gave_up = False
+        state = state.copy()
+        start_moves = get_safe_foundation_moves(state)
+        if state.is_won():
+            return start_moves
+
+        counter = itertools.count()
+        table = TranspositionTable(self.table_size)
+        table.store(state.hash, 0)
+        # Queued states are packed to keep memory down, with their hash
+        # and run lengths so unpacking needn't work them out again. Each
+        # path is a linked list of (moves, parent) so that queued nodes
+        # share their history.
+        queue = [(score(state), next(counter), state.pack(), state.hash, bytes(state.run_lengths), 0, (start_moves, None))]
+
+        while queue and self.nodes_expanded < self.max_nodes:
+            h, n, data, state_hash, run_lengths, depth, path = heapq.heappop(queue)
+            state = GameState.unpack(data, state_hash, run_lengths)
+            self.nodes_expanded += 1
+            if self.should_stop and not self.nodes_expanded % self.STOP_CHECK_INTERVAL and self.should_stop():
+                self.stopped = True
+                return None
+
+            # Children are made by applying moves to state in place and
+            # undoing them, so duplicates cost no copying
+            for move in self.get_moves(state):
+                state.apply(move)
+                moves = [move] + get_safe_foundation_moves(state)
+                if table.store(state.hash, depth + 1):
+                    child_path = (moves, path)
+                    if state.is_won():
+                        return self.unwind(child_path)
+                    heapq.heappush(queue, (score(state), next(counter), state.pack(), state.hash, bytes(state.run_lengths), depth + 1, child_path))
+                for undo in reversed(moves):
+                    state.undo(undo)
+
+        self.gave_up = bool(queue)
+        return None
+
+    def unwind(self, path):
+        steps = []
+        while path:
+            moves, path = path
+            steps.append(moves)
+        return [move for moves in reversed(steps) for move in moves]
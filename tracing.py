@@ -0,0 +1,89 @@
+"""
+Opt-in tracing of method calls, saved as Chrome trace JSON (open it in
+chrome://tracing or ui.perfetto.dev). Every call to a traced method is
+recorded as a span with microsecond timestamps; calls made inside it
+show up nested underneath.
+
+Nothing is wrapped until enable() is called, so tracing costs nothing
+when it is off. When it is on, a sample_rate below 1 traces only that
+fraction of outermost calls (with everything they call), and spans go
+into a ring buffer, so the oldest are dropped once it is full.
+"""
+import collections
+import functools
+import json
+import os
+import random
+import threading
+import time
+
+BUFFER_SIZE = 200000 # Spans
+
+depth = 0
+epoch = 0
+sample_rate = 1.0
+sampled = False
+sampler = random.Random()
+spans = collections.deque(maxlen=BUFFER_SIZE)
+wrapped = [] # (class, method name, original function)
+
+def disable():
+    """Puts back the original methods"""
+    for cls, name, fn in wrapped:
+        setattr(cls, name, fn)
+    wrapped.clear()
+
+def enable(targets, rate=1.0):
+    """
+    Traces methods, given as (class, method names) pairs. rate is the
+    fraction of outermost calls to trace.
+    """
+    global epoch, sample_rate
+    disable()
+    epoch = time.perf_counter()
+    sample_rate = rate
+    spans.clear()
+    for cls, names in targets:
+        for name in names:
+            fn = getattr(cls, name)
+            wrapped.append((cls, name, fn))
+            setattr(cls, name, trace(fn, f'{cls.__name__}.{name}'))
+
+def save(path):
+    """Writes the spans recorded so far as Chrome trace JSON"""
+    pid = os.getpid()
+    tid = threading.get_ident()
+    events = []
+    for name, start, end in spans:
+        events.append({
+            'name': name,
+            'cat': name.split('.')[0],
+            'ph': 'X',
+            'ts': round((start - epoch) * 1000000, 3),
+            'dur': round((end - start) * 1000000, 3),
+            'pid': pid,
+            'tid': tid,
+        })
+    with open(path, 'w') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+    return len(events)
+
+def trace(fn, name):
+    @functools.wraps(fn)
+    def traced(*args, **kwargs):
+        global depth, sampled
+        if not depth:
+            sampled = sample_rate >= 1 or sampler.random() < sample_rate
+        depth += 1
+        if not sampled:
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                depth -= 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            depth -= 1
+            spans.append((name, start, time.perf_counter()))
+    return traced
@@ -0,0 +1,120 @@
+import heapq
+from array import array
+
+class Scheduler(object):
+    """
+    Calls functions (e.g. Tweens.start) at set times in the future,
+    measured on the frame clock. Pending calls are kept in a heap
+    ordered by due time, so each update only looks at calls that are
+    due.
+    """
+    def __init__(self):
+        self.counter = 0 # Keeps calls due at the same time in order
+        self.queue = []
+        self.time = 0
+
+    def add(self, delay, fn, *args):
+        """Calls fn(*args) delay seconds from now"""
+        if not self.queue:
+            self.time = 0
+        heapq.heappush(self.queue, (self.time + delay, self.counter, fn, args))
+        self.counter += 1
+
+    def clear(self):
+        self.queue = []
+
+    def is_pending(self):
+        return bool(self.queue)
+
+    def update(self, dt):
+        """Advances the clock by dt seconds and makes any calls now due"""
+        if not self.queue:
+            return
+        self.time += dt
+        queue = self.queue
+        while queue and queue[0][0] <= self.time:
+            due, counter, fn, args = heapq.heappop(queue)
+            fn(*args)
+
+
+class Tweens(object):
+    """
+    Animates objects (cards) from one position to another with an
+    ease-out curve. Each object has a fixed slot (its card id), and
+    start/end positions and progress for every slot live in flat
+    arrays that are advanced together in one pass per update.
+
+    Time advances in fixed steps, so animations take the same time
+    whatever the frame rate; update() carries over any leftover time
+    to the next frame.
+    """
+    STEP = 1 / 120 # Seconds
+
+    def __init__(self, size, duration=0.25):
+        self.accumulator = 0
+        self.active = []
+        self.duration = duration
+        self.durations = array('d', [duration] * size)
+        self.elapsed = array('d', [0] * size)
+        self.end_x = array('d', [0] * size)
+        self.end_y = array('d', [0] * size)
+        self.objects = [None] * size
+        self.start_x = array('d', [0] * size)
+        self.start_y = array('d', [0] * size)
+
+    def is_animating(self):
+        return bool(self.active)
+
+    def start(self, slot, obj, target, delay=0, duration=None):
+        """
+        Starts moving obj from its current pos to target, after delay
+        seconds. Restarting a slot that is already moving picks up from
+        wherever it has got to.
+        """
+        if not self.active:
+            # Don't count time from before anything was moving
+            self.accumulator = 0
+        if slot not in self.active:
+            self.active.append(slot)
+        self.objects[slot] = obj
+        self.start_x[slot], self.start_y[slot] = obj.pos
+        self.end_x[slot], self.end_y[slot] = target
+        self.elapsed[slot] = -delay
+        self.durations[slot] = duration or self.duration
+        obj.animating = True
+
+    def update(self, dt):
+        """Advances all animations by dt seconds"""
+        if not self.active:
+            return
+        self.accumulator += dt
+        steps = int(self.accumulator / self.STEP)
+        if not steps:
+            return
+        advance = steps * self.STEP
+        self.accumulator -= advance
+
+        elapsed = self.elapsed
+        durations = self.durations
+        start_x = self.start_x
+        start_y = self.start_y
+        end_x = self.end_x
+        end_y = self.end_y
+        still_active = []
+        for slot in self.active:
+            t = elapsed[slot] + advance
+            elapsed[slot] = t
+            if t <= 0:
+                still_active.append(slot)
+                continue
+            obj = self.objects[slot]
+            progress = t / durations[slot]
+            if progress >= 1:
+                obj.pos = (int(end_x[slot]), int(end_y[slot]))
+                obj.animating = False
+                continue
+            # Ease out (cubic)
+            eased = 1 - (1 - progress) ** 3
+            obj.pos = (round(start_x[slot] + (end_x[slot] - start_x[slot]) * eased), round(start_y[slot] + (end_y[slot] - start_y[slot]) * eased))
+            still_active.append(slot)
+        self.active = still_active